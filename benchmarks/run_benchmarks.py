@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import gc
+import importlib.util
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable
+
+import numpy as np
+
+import synthetic
+
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS_DIR = REPO_ROOT / "scripts"
+TM_PATH = REPO_ROOT / "skills/ba4ai-targeting-metrics/scripts/targeting_metrics.py"
+FAKE_TOOLS_DIR = Path(__file__).resolve().parent / "fake_tools"
+
+SUITES = ("metrics", "export", "compile")
+SIZES = {"small": [10_000, 100_000, 1_000_000], "large": [10_000, 100_000, 1_000_000, 10_000_000, 100_000_000]}
+NOTEBOOKS = {
+    "small": [
+        {"sections": 20, "cells_per_section": 3, "images_per_cell": 1, "image_kb": 64},
+        {"sections": 200, "cells_per_section": 2, "images_per_cell": 1, "image_kb": 16},
+    ],
+    "large": [
+        {"sections": 20, "cells_per_section": 3, "images_per_cell": 1, "image_kb": 64},
+        {"sections": 200, "cells_per_section": 2, "images_per_cell": 1, "image_kb": 16},
+        {"sections": 100, "cells_per_section": 2, "images_per_cell": 2, "image_kb": 512},
+    ],
+}
+
+
+def _load_module(name: str, path: Path):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.spec_from_file_location(name, path)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    assert spec.loader is not None
+    spec.loader.exec_module(mod)
+    return mod
+
+
+@dataclass
+class Case:
+    name: str
+    params: dict[str, Any]
+    run: Callable[[], Any]
+    setup: Callable[[], None] | None = None
+    # Cases sharing a `resource` (a scored population, a synthetic notebook) run back to back; `release` frees
+    # it after the last of them.
+    resource: str | None = None
+    release: Callable[[], None] | None = None
+
+    @property
+    def case_id(self) -> str:
+        args = ",".join(f"{k}={v}" for k, v in self.params.items())
+        return f"{self.name}[{args}]"
+
+
+@dataclass
+class Result:
+    case_id: str
+    wall_s: float
+    peak_mem_bytes: int
+    repeats: int
+    extra: dict[str, Any] = field(default_factory=dict)
+
+
+def measure(case: Case, repeats: int) -> Result:
+    # Timings use the best of `repeats` runs without tracing; peak memory comes from one extra traced run
+    # (tracemalloc slows Python-heavy code, so it is kept out of the timed runs).
+    best = float("inf")
+    for _ in range(repeats):
+        if case.setup:
+            case.setup()
+        gc.collect()
+        t0 = time.perf_counter()
+        case.run()
+        best = min(best, time.perf_counter() - t0)
+
+    if case.setup:
+        case.setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        case.run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return Result(case_id=case.case_id, wall_s=best, peak_mem_bytes=int(peak), repeats=repeats)
+
+
+class Populations:
+    # Scored populations are generated on first use (in an untimed setup) and at most one size is alive at once,
+    # so peak memory is set by the largest selected size rather than the sum of all of them.
+    def __init__(self) -> None:
+        self.n: int | None = None
+        self.arrays: tuple[np.ndarray, np.ndarray] | None = None
+
+    def load(self, n: int) -> None:
+        if self.n != n:
+            self.release()
+            self.arrays = synthetic.scored_population(n)
+            self.n = n
+
+    def get(self) -> tuple[np.ndarray, np.ndarray]:
+        assert self.arrays is not None
+        return self.arrays
+
+    def release(self) -> None:
+        self.n = None
+        self.arrays = None
+        gc.collect()
+
+
+def metrics_cases(sizes: list[int]) -> list[Case]:
+    tm = _load_module("targeting_metrics", TM_PATH)
+    pops = Populations()
+    cases: list[Case] = []
+    for n in sizes:
+        def case(name: str, params: dict[str, Any], fn: Callable[[np.ndarray, np.ndarray], Any], n: int = n) -> Case:
+            return Case(
+                name,
+                params,
+                lambda: fn(*pops.get()),
+                setup=lambda: pops.load(n),
+                resource=f"population:{n}",
+                release=pops.release,
+            )
+
+        cases.append(case("pr_auc", {"n": n}, tm.pr_auc))
+        for k_size in (4, 50):
+            ks = synthetic.k_grid(n, k_size)
+            cases.append(case("k_metrics_table", {"n": n, "k": len(ks)}, lambda y, p, ks=ks: tm.k_metrics_table(y, p, ks)))
+        ks = synthetic.k_grid(n, 4)
+        for pc in (3, 10):
+            p_list, c_list = synthetic.pc_grid(pc)
+            cases.append(
+                case(
+                    "profit_topk_table",
+                    {"n": n, "k": len(ks), "pc": f"{pc}x{pc}"},
+                    lambda y, p, ks=ks, pl=p_list, cl=c_list: tm.profit_topk_table(y, p, ks, pl, cl),
+                )
+            )
+            cases.append(
+                case(
+                    "profit_threshold_table",
+                    {"n": n, "pc": f"{pc}x{pc}"},
+                    lambda y, p, pl=p_list, cl=c_list: tm.profit_threshold_table(y, p, pl, cl),
+                )
+            )
+    return cases
+
+
+def _quiet(fn: Callable[[], Any]) -> Callable[[], Any]:
+    def run() -> Any:
+        with contextlib.redirect_stdout(io.StringIO()):
+            return fn()
+
+    return run
+
+
+def notebook_cases(work: Path, configs: list[dict[str, Any]], suites: set[str]) -> list[Case]:
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    import concat_exported_sections as concat
+    import export_notebook_outputs as exporter
+
+    cases: list[Case] = []
+    for i, cfg in enumerate(configs):
+        nb_dir = work / f"nb{i}"
+        nb_path = nb_dir / "synthetic.ipynb"
+        out_dir = nb_dir / "export"
+        sections = out_dir / "sections"
+        params = {
+            "sections": cfg["sections"],
+            "cells": cfg["sections"] * cfg["cells_per_section"],
+            "images": cfg["sections"] * cfg["cells_per_section"] * cfg["images_per_cell"],
+            "image_kb": cfg["image_kb"],
+        }
+
+        # The notebook (and the export the compile cases read) is written on first use, after --filter.
+        def ensure_notebook(i: int = i, cfg: dict[str, Any] = cfg, nb_path: Path = nb_path) -> None:
+            if not nb_path.exists():
+                info = synthetic.synthetic_notebook(nb_path, **cfg)
+                print(f"[setup] synthetic notebook {i}: {info['notebook_bytes'] / 2**20:.1f} MiB")
+
+        def fresh_export(out_dir: Path = out_dir, ensure_notebook: Callable[[], None] = ensure_notebook) -> None:
+            ensure_notebook()
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+        def export(nb_path: Path = nb_path, out_dir: Path = out_dir) -> None:
+            exporter.export_notebook(nb_path, out_dir)
+
+        def ensure_export(
+            nb_path: Path = nb_path,
+            out_dir: Path = out_dir,
+            sections: Path = sections,
+            ensure_notebook: Callable[[], None] = ensure_notebook,
+        ) -> None:
+            ensure_notebook()
+            if not sections.exists():
+                exporter.export_notebook(nb_path, out_dir)
+            for p in sections.glob("compiled*"):
+                p.unlink()
+            for p in sections.glob("*/compiled*"):
+                p.unlink()
+
+        def compile_md(sections: Path = sections) -> None:
+            concat.main(["--sections", str(sections)])
+
+        def compile_render(sections: Path = sections) -> None:
+            concat.main(["--sections", str(sections), "--html", "--pdf", "--chrome", str(FAKE_TOOLS_DIR / "google-chrome")])
+
+        def release(nb_dir: Path = nb_dir) -> None:
+            shutil.rmtree(nb_dir, ignore_errors=True)
+
+        shared = {"resource": f"notebook:{i}", "release": release}
+        if "export" in suites:
+            cases.append(Case("export_notebook", params, export, setup=fresh_export, **shared))
+        if "compile" in suites:
+            cases.append(Case("concat_sections", params, _quiet(compile_md), setup=ensure_export, **shared))
+            cases.append(Case("concat_sections_render", params, _quiet(compile_render), setup=ensure_export, **shared))
+    return cases
+
+
+def compare(results: dict[str, Result], baseline: dict[str, Any], *, time_threshold: float, mem_threshold: float) -> list[str]:
+    failures: list[str] = []
+    base_results = baseline.get("results", {})
+    for case_id, r in results.items():
+        b = base_results.get(case_id)
+        if not b:
+            continue
+        time_ratio = r.wall_s / b["wall_s"] if b["wall_s"] > 0 else float("inf")
+        mem_ratio = r.peak_mem_bytes / b["peak_mem_bytes"] if b["peak_mem_bytes"] > 0 else 1.0
+        r.extra = {"time_ratio": time_ratio, "mem_ratio": mem_ratio}
+        if time_ratio > 1.0 + time_threshold:
+            failures.append(f"{case_id}: time {b['wall_s']:.4f}s -> {r.wall_s:.4f}s (x{time_ratio:.2f})")
+        if mem_ratio > 1.0 + mem_threshold:
+            failures.append(
+                f"{case_id}: peak memory {b['peak_mem_bytes'] / 2**20:.1f} MiB -> {r.peak_mem_bytes / 2**20:.1f} MiB (x{mem_ratio:.2f})"
+            )
+    return failures
+
+
+def _environment() -> dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "created_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Benchmark targeting metrics, the notebook exporter and the section compiler on synthetic data; "
+            "record wall time + peak memory and compare against a stored baseline JSON."
+        )
+    )
+    parser.add_argument("--suite", action="append", choices=SUITES, help="Suites to run (default: all; repeatable)")
+    parser.add_argument("--scale", choices=sorted(SIZES), default="small", help="'large' adds 10^7/10^8 rows and a ~100 MB notebook")
+    parser.add_argument("--sizes", default=None, help="Override scored-population sizes, e.g. 1e4,1e6,1e8")
+    parser.add_argument("--filter", default=None, help="Only run cases whose id contains this substring")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--out", default=None, help="Write results JSON here")
+    parser.add_argument("--baseline", default=None, help="Baseline JSON to compare against")
+    parser.add_argument("--save-baseline", default=None, help="Write results as a new baseline JSON")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = +25%%)")
+    parser.add_argument("--mem-threshold", type=float, default=0.25, help="Allowed peak-memory growth vs baseline")
+    args = parser.parse_args()
+
+    suites = set(args.suite or SUITES)
+    sizes = [int(float(s)) for s in args.sizes.split(",")] if args.sizes else SIZES[args.scale]
+
+    # Fake pandoc must win over any real install so render timings are comparable offline.
+    os.environ["PATH"] = str(FAKE_TOOLS_DIR) + os.pathsep + os.environ.get("PATH", "")
+
+    results: dict[str, Result] = {}
+    with tempfile.TemporaryDirectory(prefix="ba4ai-bench-") as tmp:
+        cases: list[Case] = []
+        if "metrics" in suites:
+            cases += metrics_cases(sizes)
+        if suites & {"export", "compile"}:
+            cases += notebook_cases(Path(tmp), NOTEBOOKS[args.scale], suites)
+        if args.filter:
+            cases = [c for c in cases if args.filter in c.case_id]
+
+        for i, case in enumerate(cases):
+            r = measure(case, max(1, args.repeats))
+            results[r.case_id] = r
+            print(f"{r.case_id:<70} {r.wall_s * 1e3:10.2f} ms  {r.peak_mem_bytes / 2**20:9.1f} MiB")
+            last_user = i + 1 == len(cases) or cases[i + 1].resource != case.resource
+            if case.release and last_user:
+                case.release()
+
+    payload = {
+        "environment": _environment(),
+        "results": {cid: {"wall_s": r.wall_s, "peak_mem_bytes": r.peak_mem_bytes, "repeats": r.repeats} for cid, r in results.items()},
+    }
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+        print(f"Saved baseline: {args.save_baseline}")
+
+    failures: list[str] = []
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        failures = compare(results, baseline, time_threshold=args.threshold, mem_threshold=args.mem_threshold)
+        for cid, r in results.items():
+            payload["results"][cid].update(r.extra)
+        missing = sorted(set(results) - set(baseline.get("results", {})))
+        if missing:
+            print(f"[baseline] {len(missing)} case(s) not in baseline (not compared).")
+
+    if args.out:
+        Path(args.out).write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+
+    if failures:
+        print(f"\nRegressions vs baseline (threshold time +{args.threshold:.0%}, memory +{args.mem_threshold:.0%}):")
+        for f in failures:
+            print(f"- {f}")
+        raise SystemExit(1)
+    if args.baseline:
+        print("\nNo regressions vs baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import base64
+import json
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+def scored_population(n: int, *, base_rate: float = 0.117, seed: int = 0, chunk: int = 5_000_000) -> tuple[np.ndarray, np.ndarray]:
+    # y ~ Bernoulli(base_rate); p_hat is informative but noisy (roughly the Option A lift profile).
+    # Generated in chunks so 10^8 rows do not need several full-size temporaries at once.
+    rng = np.random.default_rng(seed)
+    y = np.empty(n, dtype=np.int8)
+    p = np.empty(n, dtype=float)
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        m = stop - start
+        y_c = rng.random(m) < base_rate
+        logit = rng.normal(-2.3, 1.0, m) + 1.4 * y_c
+        y[start:stop] = y_c
+        p[start:stop] = 1.0 / (1.0 + np.exp(-logit))
+    return y, p
+
+
+def k_grid(n: int, size: int) -> list[int]:
+    if size <= 4:
+        return [k for k in (1000, 2000, 5000, 10000) if k <= n][:size] or [n]
+    return sorted({int(k) for k in np.geomspace(100, max(101, n // 2), size)})
+
+
+def pc_grid(size: int) -> tuple[list[float], list[float]]:
+    p_list = np.linspace(100, 1000, size).tolist()
+    c_list = np.linspace(1, 10, size).tolist()
+    return p_list, c_list
+
+
+def _html_table(rows: int, cols: int) -> str:
+    head = "".join(f"<th>col{j}</th>" for j in range(cols))
+    body = "".join("<tr>" + "".join(f"<td>{i * cols + j}</td>" for j in range(cols)) + "</tr>" for i in range(rows))
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+
+
+def synthetic_notebook(
+    path: Path,
+    *,
+    sections: int,
+    cells_per_section: int,
+    images_per_cell: int,
+    image_kb: int,
+    seed: int = 0,
+) -> dict[str, Any]:
+    rng = np.random.default_rng(seed)
+    # One random payload reused for every image: export cost is dominated by base64 decode + write, not content.
+    image_b64 = base64.b64encode(rng.bytes(image_kb * 1024)).decode("ascii") + "\n"
+    table = _html_table(20, 6)
+
+    cells: list[dict[str, Any]] = []
+    for s in range(sections):
+        cells.append(
+            {
+                "cell_type": "markdown",
+                "id": f"md{s}",
+                "metadata": {},
+                "source": [f"## Section {s} — synthetic\n", "\n", "Some slide notes.\n"],
+            }
+        )
+        for c in range(cells_per_section):
+            outputs: list[dict[str, Any]] = [{"output_type": "stream", "name": "stdout", "text": [f"cell {s}.{c}\n"]}]
+            outputs.append(
+                {
+                    "output_type": "display_data",
+                    "data": {"text/html": [table], "text/plain": ["<table>"]},
+                    "metadata": {},
+                }
+            )
+            for _ in range(images_per_cell):
+                outputs.append(
+                    {
+                        "output_type": "display_data",
+                        "data": {"image/png": image_b64, "text/plain": ["<Figure>"]},
+                        "metadata": {},
+                    }
+                )
+            cells.append(
+                {
+                    "cell_type": "code",
+                    "execution_count": 1,
+                    "id": f"code{s}_{c}",
+                    "metadata": {},
+                    "outputs": outputs,
+                    "source": [f"# Step {s}\n", "print('hello')\n"],
+                }
+            )
+
+    nb = {"cells": cells, "metadata": {}, "nbformat": 4, "nbformat_minor": 5}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(nb), encoding="utf-8")
+    return {
+        "sections": sections,
+        "cells_per_section": cells_per_section,
+        "images_per_cell": images_per_cell,
+        "image_kb": image_kb,
+        "notebook_bytes": path.stat().st_size,
+    }
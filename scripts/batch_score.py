@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import json
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from option_a_model import build_option_a_frame, load_model_artifact, read_model_meta
+
+
+TOPK_FILENAME = "topk_call_list.csv"
+THRESHOLD_FILENAME = "threshold_call_list.csv"
+SUMMARY_FILENAME = "scoring_summary.json"
+
+_WORKER_MODEL: Any = None
+
+
+@dataclass
+class ChunkResult:
+    chunk_index: int
+    n_rows: int
+    # Best k rows of this chunk only (global merge happens in the parent).
+    top_rows: np.ndarray
+    top_ids: np.ndarray
+    top_p: np.ndarray
+    # Every row with p_hat >= threshold, in input order.
+    thr_ids: np.ndarray
+    thr_p: np.ndarray
+
+
+def _init_worker(model_dir: str) -> None:
+    global _WORKER_MODEL
+    _WORKER_MODEL, _ = load_model_artifact(Path(model_dir))
+
+
+def _top_k_order(p: np.ndarray, rows: np.ndarray, k: int) -> np.ndarray:
+    # Highest p first; ties broken by input row so results don't depend on chunking or worker timing.
+    if len(p) > k:
+        cutoff = np.partition(p, len(p) - k)[len(p) - k]
+        keep = np.flatnonzero(p >= cutoff)
+    else:
+        keep = np.arange(len(p))
+    order = keep[np.lexsort((rows[keep], -p[keep]))]
+    return order[:k]
+
+
+def _score_chunk(
+    chunk_index: int,
+    start_row: int,
+    frame: pd.DataFrame,
+    id_col: str | None,
+    k: int,
+    threshold: float,
+) -> ChunkResult:
+    X = build_option_a_frame(frame)
+    p = _WORKER_MODEL.predict_proba(X)[:, 1].astype(float)
+    rows = np.arange(start_row, start_row + len(frame), dtype=np.int64)
+    ids = frame[id_col].to_numpy() if id_col else rows
+
+    top = _top_k_order(p, rows, k)
+    called = p >= threshold
+    return ChunkResult(
+        chunk_index=chunk_index,
+        n_rows=len(frame),
+        top_rows=rows[top],
+        top_ids=ids[top],
+        top_p=p[top],
+        thr_ids=ids[called],
+        thr_p=p[called],
+    )
+
+
+class TopKMerger:
+    def __init__(self, k: int) -> None:
+        self.k = k
+        self.rows = np.empty(0, dtype=np.int64)
+        self.ids = np.empty(0, dtype=object)
+        self.p = np.empty(0, dtype=float)
+
+    def add(self, rows: np.ndarray, ids: np.ndarray, p: np.ndarray) -> None:
+        all_rows = np.concatenate([self.rows, rows])
+        all_ids = np.concatenate([self.ids, ids.astype(object)])
+        all_p = np.concatenate([self.p, p])
+        keep = _top_k_order(all_p, all_rows, self.k)
+        self.rows, self.ids, self.p = all_rows[keep], all_ids[keep], all_p[keep]
+
+
+def score_file(
+    model_dir: Path,
+    input_path: Path,
+    out_dir: Path,
+    *,
+    k: int,
+    p_success: float,
+    c_call: float,
+    chunksize: int = 50_000,
+    workers: int = 1,
+    id_col: str | None = None,
+    sep: str = ",",
+) -> dict[str, Any]:
+    if k <= 0:
+        raise ValueError("k must be positive")
+    if p_success <= 0:
+        raise ValueError("p_success must be > 0")
+    if chunksize <= 0:
+        raise ValueError("chunksize must be positive")
+
+    meta = read_model_meta(model_dir)
+    model_path = meta["path"]
+    threshold = c_call / p_success
+    id_name = id_col or "row"
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    thr_path = out_dir / THRESHOLD_FILENAME
+    pd.DataFrame(columns=[id_name, "p_hat"]).to_csv(thr_path, index=False)
+
+    merger = TopKMerger(k)
+    totals = {"rows": 0, "chunks": 0, "threshold_calls": 0, "threshold_expected_conversions": 0.0}
+
+    def consume(res: ChunkResult) -> None:
+        merger.add(res.top_rows, res.top_ids, res.top_p)
+        if len(res.thr_p):
+            pd.DataFrame({id_name: res.thr_ids, "p_hat": res.thr_p}).to_csv(thr_path, mode="a", header=False, index=False)
+        totals["rows"] += res.n_rows
+        totals["chunks"] += 1
+        totals["threshold_calls"] += int(len(res.thr_p))
+        totals["threshold_expected_conversions"] += float(res.thr_p.sum())
+
+    reader = pd.read_csv(input_path, sep=sep, chunksize=chunksize)
+    start_row = 0
+    if workers <= 1:
+        _init_worker(model_path)
+        for i, frame in enumerate(reader):
+            consume(_score_chunk(i, start_row, frame, id_col, k, threshold))
+            start_row += len(frame)
+    else:
+        # Bound in-flight chunks so memory stays ~O(workers * chunksize + k); consume in submission
+        # order so the threshold list keeps input order.
+        max_pending = 2 * workers
+        pending: deque[Future[ChunkResult]] = deque()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path,)) as ex:
+            for i, frame in enumerate(reader):
+                pending.append(ex.submit(_score_chunk, i, start_row, frame, id_col, k, threshold))
+                start_row += len(frame)
+                if len(pending) >= max_pending:
+                    consume(pending.popleft().result())
+            while pending:
+                consume(pending.popleft().result())
+
+    topk_tbl = pd.DataFrame(
+        {
+            "rank": np.arange(1, len(merger.p) + 1),
+            id_name: merger.ids,
+            "p_hat": merger.p,
+        }
+    )
+    topk_path = out_dir / TOPK_FILENAME
+    topk_tbl.to_csv(topk_path, index=False)
+
+    calls_topk = int(len(merger.p))
+    topk_expected = float(merger.p.sum())
+    thr_calls = totals["threshold_calls"]
+    thr_expected = totals["threshold_expected_conversions"]
+    summary: dict[str, Any] = {
+        "input": str(input_path),
+        "model_version": meta.get("version"),
+        "model_path": model_path,
+        "rows_scored": totals["rows"],
+        "chunks": totals["chunks"],
+        "chunksize": chunksize,
+        "workers": workers,
+        "p_success": float(p_success),
+        "c_call": float(c_call),
+        "topk": {
+            "k": k,
+            "calls_made": calls_topk,
+            "expected_conversions": topk_expected,
+            "profit_expected": topk_expected * p_success - calls_topk * c_call,
+            "min_p_hat": float(merger.p.min()) if calls_topk else None,
+            "path": str(topk_path),
+        },
+        "threshold": {
+            "threshold": float(threshold),
+            "calls_made": thr_calls,
+            "expected_conversions": thr_expected,
+            "profit_expected": thr_expected * p_success - thr_calls * c_call,
+            "path": str(thr_path),
+        },
+    }
+    (out_dir / SUMMARY_FILENAME).write_text(json.dumps(summary, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return summary
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Score a customer file in chunks with the persisted calibrated model and write a ranked top-K call list "
+            "plus a threshold (t=C/P) call list."
+        )
+    )
+    parser.add_argument("--model", default="models/option-a", help="Model artifact root (latest version) or version dir")
+    parser.add_argument("--input", required=True, help="Customer CSV with the raw Option A columns")
+    parser.add_argument("--out", default="outputs/scoring")
+    parser.add_argument("--k", type=int, default=5000, help="Call capacity for the top-K list")
+    parser.add_argument("--p-success", type=float, default=500.0, help="Profit per success P")
+    parser.add_argument("--c-call", type=float, default=5.0, help="Cost per call C (threshold t=C/P)")
+    parser.add_argument("--chunksize", type=int, default=50_000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=2,
+        help="Scoring processes; each loads its own copy of the model (large for the RF candidate)",
+    )
+    parser.add_argument("--id-col", default=None, help="Customer id column to carry into the call lists")
+    parser.add_argument("--sep", default=",")
+    args = parser.parse_args()
+
+    summary = score_file(
+        Path(args.model),
+        Path(args.input),
+        Path(args.out),
+        k=args.k,
+        p_success=args.p_success,
+        c_call=args.c_call,
+        chunksize=args.chunksize,
+        workers=args.workers,
+        id_col=args.id_col,
+        sep=args.sep,
+    )
+    print(f"Scored {summary['rows_scored']:,} rows in {summary['chunks']} chunks (model {summary['model_version']}).")
+    print(f"Top-K call list (K={args.k}): {summary['topk']['path']}")
+    print(
+        f"Threshold call list (t={summary['threshold']['threshold']:.4f}, "
+        f"calls={summary['threshold']['calls_made']:,}): {summary['threshold']['path']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
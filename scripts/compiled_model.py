@@ -0,0 +1,226 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any, Sequence
+
+import numpy as np
+
+
+class CompileError(ValueError):
+    pass
+
+
+@dataclass
+class _NumericBlock:
+    cols: list[str]
+    positions: np.ndarray  # design-matrix column for each input column
+    fill: np.ndarray
+    mean: np.ndarray
+    scale: np.ndarray
+
+
+@dataclass
+class _OneHotBlock:
+    cols: list[str]
+    fill: list[Any]
+    # One flat dict per input column: category value -> design-matrix column.
+    lookups: list[dict[Any, int]]
+
+
+@dataclass
+class _Fold:
+    n_features: int
+    numeric: list[_NumericBlock]
+    onehot: list[_OneHotBlock]
+    estimator: Any
+    calibrator: tuple[str, Any] | None
+    # What the calibrator was fitted on: CalibratedClassifierCV prefers decision_function over predict_proba.
+    response_method: str = "predict_proba"
+    # Linear models are folded further: scaler + coefficients -> per-column weights, one-hot -> weight lookups.
+    linear_bias: float | None = None
+    linear_num_w: list[np.ndarray] = field(default_factory=list)
+    linear_cat_w: list[list[dict[Any, float]]] = field(default_factory=list)
+
+
+def _step_types(pipe: Any) -> list[tuple[str, Any]]:
+    from sklearn.pipeline import Pipeline
+
+    if isinstance(pipe, Pipeline):
+        return [(type(step).__name__, step) for _, step in pipe.steps]
+    return [(type(pipe).__name__, pipe)]
+
+
+def _compile_column_transformer(ct: Any) -> tuple[int, list[_NumericBlock], list[_OneHotBlock]]:
+    numeric: list[_NumericBlock] = []
+    onehot: list[_OneHotBlock] = []
+    n_features = 0
+    for name, trans, cols in ct.transformers_:
+        sl = ct.output_indices_[name]
+        n_features = max(n_features, sl.stop)
+        if (isinstance(trans, str) and trans == "drop") or sl.start == sl.stop:
+            continue
+        if isinstance(trans, str) or not isinstance(cols, list) or not all(isinstance(c, str) for c in cols):
+            raise CompileError(f"Unsupported transformer block: {name}")
+
+        fill: list[Any] | None = None
+        mean = np.zeros(len(cols))
+        scale = np.ones(len(cols))
+        encoder = None
+        for step_name, step in _step_types(trans):
+            if step_name == "SimpleImputer":
+                if len(step.statistics_) != len(cols):
+                    raise CompileError(f"Imputer in '{name}' dropped columns")
+                fill = list(step.statistics_)
+            elif step_name == "StandardScaler":
+                if step.mean_ is not None:
+                    mean = np.asarray(step.mean_, dtype=float)
+                if step.scale_ is not None:
+                    scale = np.asarray(step.scale_, dtype=float)
+            elif step_name == "OneHotEncoder":
+                if step.drop_idx_ is not None or getattr(step, "_infrequent_enabled", False):
+                    raise CompileError(f"Unsupported OneHotEncoder options in '{name}'")
+                if step.handle_unknown not in {"ignore", "infrequent_if_exist"}:
+                    raise CompileError(f"OneHotEncoder in '{name}' must ignore unknown categories")
+                encoder = step
+            else:
+                raise CompileError(f"Unsupported step '{step_name}' in '{name}'")
+
+        if encoder is None:
+            numeric.append(
+                _NumericBlock(
+                    cols=list(cols),
+                    positions=np.arange(sl.start, sl.stop),
+                    fill=np.asarray(fill if fill is not None else [np.nan] * len(cols), dtype=float),
+                    mean=mean,
+                    scale=scale,
+                )
+            )
+            continue
+
+        lookups: list[dict[Any, int]] = []
+        offset = sl.start
+        for cats in encoder.categories_:
+            lookups.append({c: offset + j for j, c in enumerate(cats.tolist())})
+            offset += len(cats)
+        if offset != sl.stop:
+            raise CompileError(f"One-hot width mismatch in '{name}'")
+        onehot.append(_OneHotBlock(cols=list(cols), fill=fill if fill is not None else [None] * len(cols), lookups=lookups))
+    return n_features, numeric, onehot
+
+
+def _compile_fold(pipe: Any, calibrator: tuple[str, Any] | None) -> _Fold:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+    if not isinstance(pipe, Pipeline) or len(pipe.steps) != 2:
+        raise CompileError("Expected Pipeline([('preprocess', ColumnTransformer), ('model', estimator)])")
+    pre, est = pipe.steps[0][1], pipe.steps[1][1]
+    if not isinstance(pre, ColumnTransformer):
+        raise CompileError("First pipeline step must be a ColumnTransformer")
+
+    n_features, numeric, onehot = _compile_column_transformer(pre)
+    # Same order as sklearn's calibration (_get_response_values): decision_function first, then predict_proba.
+    if calibrator is not None and hasattr(est, "decision_function"):
+        response_method = "decision_function"
+    elif hasattr(est, "predict_proba"):
+        response_method = "predict_proba"
+    else:
+        raise CompileError(f"Final estimator {type(est).__name__} has no predict_proba")
+    fold = _Fold(
+        n_features=n_features,
+        numeric=numeric,
+        onehot=onehot,
+        estimator=est,
+        calibrator=calibrator,
+        response_method=response_method,
+    )
+
+    coef = getattr(est, "coef_", None)
+    if coef is not None and hasattr(est, "decision_function") and np.shape(coef) == (1, n_features):
+        w = np.asarray(coef, dtype=float).ravel()
+        bias = float(np.ravel(est.intercept_)[0])
+        for blk in numeric:
+            w_eff = w[blk.positions] / blk.scale
+            bias -= float(np.dot(w_eff, blk.mean))
+            fold.linear_num_w.append(w_eff)
+        for blk in onehot:
+            fold.linear_cat_w.append([{v: float(w[idx]) for v, idx in lut.items()} for lut in blk.lookups])
+        fold.linear_bias = bias
+    return fold
+
+
+def _fill_value(v: Any, fill: Any) -> Any:
+    if v is None or (isinstance(v, float) and v != v):
+        return fill
+    return v
+
+
+class CompiledModel:
+    def __init__(self, folds: list[_Fold]) -> None:
+        self.folds = folds
+
+    @property
+    def kind(self) -> str:
+        return "linear" if all(f.linear_bias is not None for f in self.folds) else "design-matrix"
+
+    def _numeric_matrix(self, blk: _NumericBlock, records: Sequence[dict[str, Any]]) -> np.ndarray:
+        vals = np.array([[r[c] for c in blk.cols] for r in records], dtype=float)
+        return np.where(np.isnan(vals), blk.fill, vals)
+
+    def _raw_response(self, fold: _Fold, records: Sequence[dict[str, Any]]) -> np.ndarray:
+        n = len(records)
+        if fold.linear_bias is not None:
+            out = np.full(n, fold.linear_bias)
+            for blk, w in zip(fold.numeric, fold.linear_num_w):
+                out += self._numeric_matrix(blk, records) @ w
+            for blk, weights in zip(fold.onehot, fold.linear_cat_w):
+                for col, fill, lut in zip(blk.cols, blk.fill, weights):
+                    out += np.fromiter((lut.get(_fill_value(r[col], fill), 0.0) for r in records), dtype=float, count=n)
+            return out
+
+        X = np.zeros((n, fold.n_features))
+        for blk in fold.numeric:
+            X[:, blk.positions] = (self._numeric_matrix(blk, records) - blk.mean) / blk.scale
+        for blk in fold.onehot:
+            for col, fill, lut in zip(blk.cols, blk.fill, blk.lookups):
+                for i, r in enumerate(records):
+                    idx = lut.get(_fill_value(r[col], fill))
+                    if idx is not None:
+                        X[i, idx] = 1.0
+        if fold.response_method == "decision_function":
+            return np.ravel(fold.estimator.decision_function(X))
+        return fold.estimator.predict_proba(X)[:, 1]
+
+    def predict_proba_records(self, records: Sequence[dict[str, Any]]) -> np.ndarray:
+        if not records:
+            return np.empty(0)
+        total = np.zeros(len(records))
+        for fold in self.folds:
+            raw = self._raw_response(fold, records)
+            if fold.calibrator is None:
+                p = 1.0 / (1.0 + np.exp(-raw)) if fold.linear_bias is not None else raw
+            else:
+                method, cal = fold.calibrator
+                if method == "sigmoid":
+                    p = 1.0 / (1.0 + np.exp(cal.a_ * raw + cal.b_))
+                else:
+                    p = np.interp(raw, cal.X_thresholds_, cal.y_thresholds_)
+            total += p
+        p = total / len(self.folds)
+        p[(1.0 < p) & (p <= 1.0 + 1e-5)] = 1.0
+        return p
+
+
+def compile_model(model: Any) -> CompiledModel:
+    from sklearn.calibration import CalibratedClassifierCV
+
+    if isinstance(model, CalibratedClassifierCV):
+        folds = []
+        for cc in model.calibrated_classifiers_:
+            method = getattr(cc, "method", None)
+            if method not in {"sigmoid", "isotonic"} or len(cc.calibrators) != 1:
+                raise CompileError(f"Unsupported calibration: {method}")
+            est = getattr(cc, "estimator", None) or getattr(cc, "base_estimator", None)
+            folds.append(_compile_fold(est, (method, cc.calibrators[0])))
+        return CompiledModel(folds)
+    return CompiledModel([_compile_fold(model, None)])
@@ -3,14 +3,16 @@
 from __future__ import annotations
 
 import argparse
+import json
 import re
 import shutil
-import subprocess
 import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 from urllib.parse import urlparse
 
+from stage_timing import NULL_RECORDER, StageRecorder, profiled
+
 
 SECTION_MD_RE = re.compile(r"^\d{2}_.+\.md$")
 CELL_CODE_RE = re.compile(r"^cell(\d{2})_code\.py$")
@@ -124,7 +126,7 @@ def concat_section(section_dir: Path, *, include_code: bool, include_json: bool)
     return out_path
 
 
-def render_html(md_path: Path, *, resource_path: Path | None = None) -> Path:
+def render_html(md_path: Path, *, resource_path: Path | None = None, recorder: StageRecorder | None = None) -> Path:
     if not shutil.which("pandoc"):
         raise RuntimeError("pandoc is not available on PATH")
     html_path = md_path.with_suffix(".html")
@@ -139,7 +141,8 @@ def render_html(md_path: Path, *, resource_path: Path | None = None) -> Path:
     ]
     if resource_path:
         cmd += ["--resource-path", str(resource_path)]
-    subprocess.run(cmd, check=True)
+    rec = recorder or NULL_RECORDER
+    rec.run(cmd, "pandoc", output=html_path, path=str(md_path))
     return html_path
 
 
@@ -175,7 +178,7 @@ def _is_file_url(s: str) -> bool:
         return False
 
 
-def render_pdf_from_html(html_path: Path, *, chrome: str | None) -> Path:
+def render_pdf_from_html(html_path: Path, *, chrome: str | None, recorder: StageRecorder | None = None) -> Path:
     chrome_bin = _find_chrome(chrome)
     if not chrome_bin:
         raise RuntimeError(
@@ -212,7 +215,8 @@ def render_pdf_from_html(html_path: Path, *, chrome: str | None) -> Path:
             f"--print-to-pdf={pdf_path}",
             url,
         ]
-        subprocess.run(cmd, check=True)
+        rec = recorder or NULL_RECORDER
+        rec.run(cmd, "chrome", output=pdf_path, path=str(html_path))
     return pdf_path
 
 
@@ -242,7 +246,7 @@ def _rewrite_resource_links(section_name: str, text: str, resource_names: set[st
     return text
 
 
-def main() -> None:
+def main(argv: list[str] | None = None) -> None:
     parser = argparse.ArgumentParser(
         description=(
             "Concatenate exported notebook section artifacts into compiled markdown, render HTML via pandoc, "
@@ -263,7 +267,17 @@ def main() -> None:
         help="Convert compiled.html -> compiled.pdf using headless Chrome (implies HTML render)",
     )
     parser.add_argument("--chrome", default=None, help="Chrome executable path (defaults to common macOS location)")
-    args = parser.parse_args()
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Write compile_summary.json with per-section wall time, bytes written and peak RSS (incl. pandoc/Chrome)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Also dump cProfile stats to <sections>/compile.prof (implies --timings)",
+    )
+    args = parser.parse_args(argv)
 
     sections_root = Path(args.sections)
     if not sections_root.exists():
@@ -273,43 +287,64 @@ def main() -> None:
     if not section_dirs:
         raise SystemExit(f"No section directories found under: {sections_root}")
 
+    rec = StageRecorder() if args.timings or args.profile else NULL_RECORDER
     compiled: list[Path] = []
     pdf_ok = 0
     pdf_fail = 0
-    for sd in section_dirs:
-        md = concat_section(sd, include_code=args.include_code, include_json=args.include_json)
-        compiled.append(md)
-        html_path = None
-        if args.html or args.pdf:
-            html_path = render_html(md, resource_path=sd)
-        if args.pdf and html_path:
-            try:
-                render_pdf_from_html(html_path, chrome=args.chrome)
-                pdf_ok += 1
-            except Exception as e:
-                print(f"[pdf skipped] {html_path}: {e}")
-                pdf_fail += 1
-
-    combined_md = sections_root / "compiled_all.md"
-    parts: list[str] = ["# Notebook exports (compiled)\n\n"]
-    for md in compiled:
-        title = md.parent.name
-        parts.append(f"\n\n<div style=\"page-break-after: always;\"></div>\n\n## {title}\n\n")
-        resources = {p.name for p in md.parent.iterdir() if p.is_file()}
-        section_text = _rewrite_resource_links(md.parent.name, _read_text(md), resources)
-        parts.append(section_text.rstrip() + "\n")
-    combined_md.write_text("".join(parts), encoding="utf-8")
-
-    combined_html = None
-    if args.html or args.pdf:
-        combined_html = render_html(combined_md, resource_path=sections_root)
-    if args.pdf and combined_html:
-        try:
-            render_pdf_from_html(combined_html, chrome=args.chrome)
-            pdf_ok += 1
-        except Exception as e:
-            print(f"[pdf skipped] {combined_html}: {e}")
-            pdf_fail += 1
+    with profiled(sections_root / "compile.prof" if args.profile else None):
+        for sd in section_dirs:
+            with rec.stage("section", section=sd.name):
+                with rec.stage("concat"):
+                    md = concat_section(sd, include_code=args.include_code, include_json=args.include_json)
+                    rec.add_file(md)
+                compiled.append(md)
+                html_path = None
+                if args.html or args.pdf:
+                    html_path = render_html(md, resource_path=sd, recorder=rec)
+                if args.pdf and html_path:
+                    try:
+                        render_pdf_from_html(html_path, chrome=args.chrome, recorder=rec)
+                        pdf_ok += 1
+                    except Exception as e:
+                        print(f"[pdf skipped] {html_path}: {e}")
+                        pdf_fail += 1
+
+        with rec.stage("section", section="compiled_all"):
+            combined_md = sections_root / "compiled_all.md"
+            with rec.stage("concat"):
+                parts: list[str] = ["# Notebook exports (compiled)\n\n"]
+                for md in compiled:
+                    title = md.parent.name
+                    parts.append(f"\n\n<div style=\"page-break-after: always;\"></div>\n\n## {title}\n\n")
+                    resources = {p.name for p in md.parent.iterdir() if p.is_file()}
+                    section_text = _rewrite_resource_links(md.parent.name, _read_text(md), resources)
+                    parts.append(section_text.rstrip() + "\n")
+                combined_md.write_text("".join(parts), encoding="utf-8")
+                rec.add_file(combined_md)
+
+            combined_html = None
+            if args.html or args.pdf:
+                combined_html = render_html(combined_md, resource_path=sections_root, recorder=rec)
+            if args.pdf and combined_html:
+                try:
+                    render_pdf_from_html(combined_html, chrome=args.chrome, recorder=rec)
+                    pdf_ok += 1
+                except Exception as e:
+                    print(f"[pdf skipped] {combined_html}: {e}")
+                    pdf_fail += 1
+
+    if rec.enabled:
+        summary = {
+            "sections_root": str(sections_root),
+            "sections": len(compiled),
+            "html": bool(args.html or args.pdf),
+            "pdf": bool(args.pdf),
+            "pdf_ok": pdf_ok,
+            "pdf_failed": pdf_fail,
+            "profile": rec.to_dict(),
+        }
+        summary_path = sections_root / "compile_summary.json"
+        summary_path.write_text(json.dumps(summary, indent=2) + "\n", encoding="utf-8")
 
     print(f"Wrote {len(compiled)} per-section compiled markdown files (compiled.md).")
     print(f"Wrote combined markdown: {combined_md}")
@@ -319,6 +354,10 @@ def main() -> None:
         print(f"PDF render results: ok={pdf_ok}, failed={pdf_fail} (HTML -> PDF via headless Chrome).")
     if not args.html and not args.pdf:
         print("Rendering skipped (use --html and/or --pdf).")
+    if rec.enabled:
+        print(f"Wrote stage timings: {summary_path}")
+    if args.profile:
+        print(f"Wrote cProfile stats: {sections_root / 'compile.prof'} (+ .txt summary)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import importlib.util
+import os
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+
+TM_PATH = Path(__file__).resolve().parents[1] / "skills/ba4ai-targeting-metrics/scripts/targeting_metrics.py"
+
+
+def _load_targeting_metrics():
+    if "targeting_metrics" in sys.modules:
+        return sys.modules["targeting_metrics"]
+    spec = importlib.util.spec_from_file_location("targeting_metrics", TM_PATH)
+    mod = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = mod
+    assert spec.loader is not None
+    spec.loader.exec_module(mod)
+    return mod
+
+
+tm = _load_targeting_metrics()
+
+SCORINGS = {"pr_auc", "lift"}
+
+
+@dataclass(frozen=True)
+class DriverImportanceRow:
+    feature: str
+    n_columns: int
+    baseline_score: float
+    importance_mean: float
+    importance_std: float
+
+
+def raw_feature_blocks(ct: Any) -> dict[str, np.ndarray]:
+    # Map each raw input column of a fitted ColumnTransformer to its columns in the transformed matrix.
+    from sklearn.pipeline import Pipeline
+
+    blocks: dict[str, list[int]] = {}
+    for name, trans, cols in ct.transformers_:
+        sl = ct.output_indices_[name]
+        if sl.start == sl.stop:
+            continue
+        if isinstance(trans, str) or not isinstance(cols, list) or not all(isinstance(c, str) for c in cols):
+            raise ValueError(f"Cannot map transformer block '{name}' back to named raw columns")
+
+        last = trans.steps[-1][1] if isinstance(trans, Pipeline) else trans
+        if type(last).__name__ == "OneHotEncoder":
+            if getattr(last, "_infrequent_enabled", False):
+                raise ValueError(f"Infrequent-category grouping in '{name}' is not supported")
+            drop_idx = last.drop_idx_ if last.drop_idx_ is not None else [None] * len(cols)
+            widths = [len(cats) - (d is not None) for cats, d in zip(last.categories_, drop_idx)]
+        elif sl.stop - sl.start == len(cols):
+            widths = [1] * len(cols)
+        else:
+            raise ValueError(f"Transformer block '{name}' changes the column count; cannot map raw columns")
+
+        offset = sl.start
+        for col, width in zip(cols, widths):
+            blocks.setdefault(col, []).extend(range(offset, offset + width))
+            offset += width
+    return {col: np.asarray(idx, dtype=np.intp) for col, idx in blocks.items()}
+
+
+def _score(y: np.ndarray, p: np.ndarray, scoring: str, k: int | None) -> float:
+    if scoring == "pr_auc":
+        return tm.pr_auc(y, p)
+    return tm.lift_at_k(y, p, int(k))
+
+
+def _permuted_scores(
+    Xp: np.ndarray,
+    estimator: Any,
+    y: np.ndarray,
+    blocks: list[np.ndarray],
+    scoring: str,
+    k: int | None,
+    seed: np.random.SeedSequence,
+) -> np.ndarray:
+    # Xp must be writable and private to the caller: each block is permuted in place and restored after scoring.
+    rng = np.random.default_rng(seed)
+    scores = np.empty(len(blocks))
+    for j, cols in enumerate(blocks):
+        saved = Xp[:, cols].copy()
+        Xp[:, cols] = saved[rng.permutation(len(Xp))]
+        scores[j] = _score(y, estimator.predict_proba(Xp)[:, 1], scoring, k)
+        Xp[:, cols] = saved
+    return scores
+
+
+_WORKER: dict[str, Any] = {}
+
+
+def _init_worker(xt_path: str, estimator: Any, y: np.ndarray, blocks: list[np.ndarray], scoring: str, k: int | None) -> None:
+    # One writable copy per worker, reused by every repeat it runs. The pool already uses the cores, so the
+    # estimator's own parallelism (e.g. RandomForest n_jobs=-1) is switched off to avoid oversubscription.
+    if "n_jobs" in estimator.get_params():
+        estimator.set_params(n_jobs=1)
+    Xp = np.array(np.load(xt_path, mmap_mode="r"), dtype=float)
+    _WORKER.update(Xp=Xp, estimator=estimator, y=y, blocks=blocks, scoring=scoring, k=k)
+
+
+def _run_repeat(seed: np.random.SeedSequence) -> np.ndarray:
+    w = _WORKER
+    return _permuted_scores(w["Xp"], w["estimator"], w["y"], w["blocks"], w["scoring"], w["k"], seed)
+
+
+def grouped_permutation_importance(
+    pipeline: Any,
+    X,
+    y,
+    *,
+    scoring: str = "pr_auc",
+    k: int | None = None,
+    n_repeats: int = 5,
+    random_state: int | None = None,
+    n_jobs: int = 1,
+) -> list[DriverImportanceRow]:
+    from sklearn.compose import ColumnTransformer
+    from sklearn.pipeline import Pipeline
+
+    if scoring not in SCORINGS:
+        raise ValueError(f"scoring must be one of {sorted(SCORINGS)}")
+    if scoring == "lift" and (k is None or k <= 0):
+        raise ValueError("scoring='lift' needs a positive k")
+    if n_repeats <= 0:
+        raise ValueError("n_repeats must be positive")
+    if not isinstance(pipeline, Pipeline) or len(pipeline.steps) != 2 or not isinstance(pipeline.steps[0][1], ColumnTransformer):
+        raise ValueError(
+            "Expected a fitted Pipeline([('preprocess', ColumnTransformer), ('model', estimator)]); "
+            "pass the uncalibrated selected model (MODEL_SELECTED)"
+        )
+
+    ct, estimator = pipeline.steps[0][1], pipeline.steps[1][1]
+    y_arr = np.asarray(y).astype(int)
+    Xt = ct.transform(X)
+    if hasattr(Xt, "toarray"):
+        Xt = Xt.toarray()
+    Xt = np.ascontiguousarray(Xt, dtype=float)
+
+    feature_blocks = raw_feature_blocks(ct)
+    features = list(feature_blocks)
+    blocks = [feature_blocks[f] for f in features]
+    baseline = _score(y_arr, estimator.predict_proba(Xt)[:, 1], scoring, k)
+    seeds = np.random.SeedSequence(random_state).spawn(n_repeats)
+
+    n_workers = (os.cpu_count() or 1) if n_jobs in (-1, None) else max(1, n_jobs)
+    workers = min(n_repeats, n_workers)
+    if workers <= 1:
+        # Xt is our own array (from ct.transform) and every block is restored, so permute it in place.
+        permuted = [_permuted_scores(Xt, estimator, y_arr, blocks, scoring, k, s) for s in seeds]
+    else:
+        # Hand the transformed matrix to workers through a .npy file instead of pickling it through the pool.
+        # Each worker keeps one writable copy, so peak memory is about (workers + 1) x the transformed matrix.
+        with tempfile.TemporaryDirectory(prefix="driver-importance-") as tmp:
+            xt_path = str(Path(tmp) / "Xt.npy")
+            np.save(xt_path, Xt)
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(xt_path, estimator, y_arr, blocks, scoring, k),
+            ) as ex:
+                permuted = list(ex.map(_run_repeat, seeds))
+
+    drops = baseline - np.vstack(permuted)  # (n_repeats, n_features)
+    rows = [
+        DriverImportanceRow(
+            feature=f,
+            n_columns=int(len(blocks[j])),
+            baseline_score=float(baseline),
+            importance_mean=float(drops[:, j].mean()),
+            importance_std=float(drops[:, j].std()),
+        )
+        for j, f in enumerate(features)
+    ]
+    return sorted(rows, key=lambda r: r.importance_mean, reverse=True)
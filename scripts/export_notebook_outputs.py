@@ -10,6 +10,8 @@ from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from stage_timing import NULL_RECORDER, StageRecorder, profiled
+
 
 def _slugify(text: str, max_len: int = 60) -> str:
     text = text.strip().lower()
@@ -31,14 +33,16 @@ def _ensure_list_str(x: Any) -> list[str]:
     raise TypeError(f"Expected str or list[str], got {type(x)}")
 
 
-def _write_text(path: Path, text: str) -> None:
+def _write_text(path: Path, text: str) -> int:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(text, encoding="utf-8")
+    return path.stat().st_size
 
 
-def _write_bytes(path: Path, data: bytes) -> None:
+def _write_bytes(path: Path, data: bytes) -> int:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_bytes(data)
+    return len(data)
 
 
 def _mime_to_ext(mime: str) -> str:
@@ -86,8 +90,24 @@ def _normalize_output_data(data: Any) -> str:
     return json.dumps(data, ensure_ascii=False, indent=2)
 
 
-def export_notebook(ipynb_path: Path, out_dir: Path) -> None:
-    nb = json.loads(ipynb_path.read_text(encoding="utf-8"))
+def export_notebook(ipynb_path: Path, out_dir: Path, *, recorder: StageRecorder | None = None) -> None:
+    # With a recorder, per-stage timings (read, JSON parse, base64 decode, writes) per cell and section
+    # are added to manifest.json under "profile".
+    rec = recorder or NULL_RECORDER
+
+    def write_text(path: Path, text: str) -> None:
+        with rec.stage("write"):
+            rec.add_bytes(_write_text(path, text))
+
+    def write_bytes(path: Path, data: bytes) -> None:
+        with rec.stage("write"):
+            rec.add_bytes(_write_bytes(path, data))
+
+    with rec.stage("read", path=str(ipynb_path)):
+        nb_text = ipynb_path.read_text(encoding="utf-8")
+    with rec.stage("json_parse"):
+        nb = json.loads(nb_text)
+    del nb_text
     cells = nb.get("cells", [])
 
     root = out_dir
@@ -112,7 +132,8 @@ def export_notebook(ipynb_path: Path, out_dir: Path) -> None:
         section_dir = sections_dir / name
         section_dir.mkdir(parents=True, exist_ok=True)
         md_path = section_dir / f"{name}.md"
-        _write_text(md_path, md_text)
+        with rec.stage("section_markdown", section_index=section_counter, cell_index=cell_index):
+            write_text(md_path, md_text)
         sec = Section(index=section_counter, title=heading, slug=slug, dir=section_dir, markdown_path=md_path)
         manifest["sections"].append(
             {
@@ -153,83 +174,90 @@ def export_notebook(ipynb_path: Path, out_dir: Path) -> None:
         if sec_entry is None:
             continue
 
-        # Always export the code cell source for slide-building/debugging, even if it has no outputs.
-        code_stub = "".join(_ensure_list_str(cell.get("source"))).strip()
-        if code_stub:
-            code_path = current_section.dir / f"cell{i:02d}_code.py"
-            _write_text(code_path, code_stub + "\n")
-            sec_entry["outputs"].append({"cell_index": i, "type": "code", "path": str(code_path)})
-
-        outputs = cell.get("outputs", [])
-        if not outputs:
-            manifest["code_cells_without_outputs"].append(
-                {
-                    "cell_index": i,
-                    "cell_id": cell.get("id"),
-                }
-            )
-            continue
-
-        out_count = 0
-        for out in outputs:
-            out_type = out.get("output_type")
-
-            if out_type == "stream":
-                text = _normalize_output_data(out.get("text", ""))
-                p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_stream.txt"
-                _write_text(p, text)
-                sec_entry["outputs"].append({"cell_index": i, "type": "stream", "path": str(p)})
-                out_count += 1
+        with rec.stage("cell", cell_index=i, section_index=current_section.index):
+            # Always export the code cell source for slide-building/debugging, even if it has no outputs.
+            code_stub = "".join(_ensure_list_str(cell.get("source"))).strip()
+            if code_stub:
+                code_path = current_section.dir / f"cell{i:02d}_code.py"
+                write_text(code_path, code_stub + "\n")
+                sec_entry["outputs"].append({"cell_index": i, "type": "code", "path": str(code_path)})
+
+            outputs = cell.get("outputs", [])
+            if not outputs:
+                manifest["code_cells_without_outputs"].append(
+                    {
+                        "cell_index": i,
+                        "cell_id": cell.get("id"),
+                    }
+                )
                 continue
 
-            if out_type in {"execute_result", "display_data"}:
-                data = out.get("data", {}) or {}
-                # Prefer images, then html, then plain text, then everything else.
-                for mime, payload in data.items():
-                    if mime.startswith("image/"):
-                        ext = _mime_to_ext(mime)
-                        p = current_section.dir / f"cell{i:02d}_out{out_count:02d}.{ext}"
-                        if mime == "image/svg+xml":
-                            _write_text(p, _normalize_output_data(payload))
-                        else:
-                            b64 = _normalize_output_data(payload)
-                            _write_bytes(p, base64.b64decode(b64))
-                        sec_entry["outputs"].append({"cell_index": i, "type": mime, "path": str(p)})
-                        out_count += 1
+            out_count = 0
+            for out in outputs:
+                out_type = out.get("output_type")
 
-                for mime in ["text/html", "text/plain"]:
-                    if mime in data:
+                if out_type == "stream":
+                    text = _normalize_output_data(out.get("text", ""))
+                    p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_stream.txt"
+                    write_text(p, text)
+                    sec_entry["outputs"].append({"cell_index": i, "type": "stream", "path": str(p)})
+                    out_count += 1
+                    continue
+
+                if out_type in {"execute_result", "display_data"}:
+                    data = out.get("data", {}) or {}
+                    # Prefer images, then html, then plain text, then everything else.
+                    for mime, payload in data.items():
+                        if mime.startswith("image/"):
+                            ext = _mime_to_ext(mime)
+                            p = current_section.dir / f"cell{i:02d}_out{out_count:02d}.{ext}"
+                            if mime == "image/svg+xml":
+                                write_text(p, _normalize_output_data(payload))
+                            else:
+                                b64 = _normalize_output_data(payload)
+                                with rec.stage("b64decode"):
+                                    raw = base64.b64decode(b64)
+                                write_bytes(p, raw)
+                            sec_entry["outputs"].append({"cell_index": i, "type": mime, "path": str(p)})
+                            out_count += 1
+
+                    for mime in ["text/html", "text/plain"]:
+                        if mime in data:
+                            ext = _mime_to_ext(mime)
+                            p = current_section.dir / f"cell{i:02d}_out{out_count:02d}.{ext}"
+                            write_text(p, _normalize_output_data(data[mime]))
+                            sec_entry["outputs"].append({"cell_index": i, "type": mime, "path": str(p)})
+                            out_count += 1
+
+                    for mime, payload in data.items():
+                        if mime in {"text/html", "text/plain"} or mime.startswith("image/"):
+                            continue
                         ext = _mime_to_ext(mime)
-                        p = current_section.dir / f"cell{i:02d}_out{out_count:02d}.{ext}"
-                        _write_text(p, _normalize_output_data(data[mime]))
+                        safe_mime = re.sub(r"[^a-zA-Z0-9._-]+", "_", mime)
+                        p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_{safe_mime}.{ext}"
+                        write_text(p, _normalize_output_data(payload))
                         sec_entry["outputs"].append({"cell_index": i, "type": mime, "path": str(p)})
                         out_count += 1
+                    continue
 
-                for mime, payload in data.items():
-                    if mime in {"text/html", "text/plain"} or mime.startswith("image/"):
-                        continue
-                    ext = _mime_to_ext(mime)
-                    safe_mime = re.sub(r"[^a-zA-Z0-9._-]+", "_", mime)
-                    p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_{safe_mime}.{ext}"
-                    _write_text(p, _normalize_output_data(payload))
-                    sec_entry["outputs"].append({"cell_index": i, "type": mime, "path": str(p)})
+                if out_type == "error":
+                    traceback = "\n".join(_ensure_list_str(out.get("traceback", [])))
+                    p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_error.txt"
+                    write_text(p, traceback)
+                    sec_entry["outputs"].append({"cell_index": i, "type": "error", "path": str(p)})
                     out_count += 1
-                continue
+                    continue
 
-            if out_type == "error":
-                traceback = "\n".join(_ensure_list_str(out.get("traceback", [])))
-                p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_error.txt"
-                _write_text(p, traceback)
-                sec_entry["outputs"].append({"cell_index": i, "type": "error", "path": str(p)})
+                # Unknown output type: dump JSON.
+                p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_raw.json"
+                write_text(p, json.dumps(out, ensure_ascii=False, indent=2))
+                sec_entry["outputs"].append({"cell_index": i, "type": "raw", "path": str(p)})
                 out_count += 1
-                continue
-
-            # Unknown output type: dump JSON.
-            p = current_section.dir / f"cell{i:02d}_out{out_count:02d}_raw.json"
-            _write_text(p, json.dumps(out, ensure_ascii=False, indent=2))
-            sec_entry["outputs"].append({"cell_index": i, "type": "raw", "path": str(p)})
-            out_count += 1
 
+    if rec.enabled:
+        profile = rec.to_dict()
+        profile["sections"] = rec.rollup("section_index", {"section_markdown", "cell"})
+        manifest["profile"] = profile
     _write_text(root / "manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2) + "\n")
     _write_text(
         root / "README.md",
@@ -252,9 +280,18 @@ def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--notebook", default="project.ipynb")
     parser.add_argument("--out", default="outputs/project-ipynb")
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Record per-section/per-cell wall time, bytes written and peak RSS into manifest.json",
+    )
+    parser.add_argument("--profile", action="store_true", help="Also dump cProfile stats to <out>/export.prof (implies --timings)")
     args = parser.parse_args()
 
-    export_notebook(Path(args.notebook), Path(args.out))
+    out_dir = Path(args.out)
+    recorder = StageRecorder(aggregate_only={"write", "b64decode"}) if args.timings or args.profile else None
+    with profiled(out_dir / "export.prof" if args.profile else None):
+        export_notebook(Path(args.notebook), out_dir, recorder=recorder)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import platform
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+
+# Mirrors Step 5 in project.ipynb: only features plausibly known BEFORE placing the call.
+OPTION_A_BASE_FEATURES = [
+    "age",
+    "job",
+    "marital",
+    "education",
+    "default",
+    "balance",
+    "housing",
+    "loan",
+    "pdays",
+    "previous",
+    "poutcome",
+]
+CATEGORICAL_COLS = ["job", "marital", "education", "default", "housing", "loan", "poutcome"]
+NUMERIC_COLS = ["age", "balance", "previous", "pdays_clean", "prev_contacted"]
+RAW_NUMERIC_COLS = ["age", "balance", "pdays", "previous"]
+
+UNKNOWN_TOKENS = {"unknown", "Unknown", "UNKNOWN"}
+PDAYS_NO_PREV_SENTINELS = {-1, 999}
+
+MODEL_FILENAME = "model.joblib"
+META_FILENAME = "meta.json"
+VERSION_RE = re.compile(r"^v(\d{3,})$")
+
+
+def build_option_a_frame(X_raw: pd.DataFrame) -> pd.DataFrame:
+    missing_cols = [c for c in OPTION_A_BASE_FEATURES if c not in X_raw.columns]
+    if missing_cols:
+        raise KeyError(f"Missing expected Option A columns: {missing_cols}")
+
+    X = X_raw[OPTION_A_BASE_FEATURES].copy()
+    for col in X.columns:
+        if col in RAW_NUMERIC_COLS:
+            # CSV inputs can carry stray strings; anything non-numeric becomes missing (imputed later).
+            X[col] = pd.to_numeric(X[col], errors="coerce")
+        elif pd.api.types.is_object_dtype(X[col]) or pd.api.types.is_string_dtype(X[col]):
+            # None/NaN/unknown tokens all become np.nan so SimpleImputer sees them as missing.
+            X[col] = X[col].where(X[col].notna() & ~X[col].isin(UNKNOWN_TOKENS), np.nan)
+
+    pdays_clean = X["pdays"].where(~X["pdays"].isin(PDAYS_NO_PREV_SENTINELS), np.nan)
+    X["pdays_clean"] = pdays_clean
+    X["prev_contacted"] = pdays_clean.notna().astype(int)
+    return X.drop(columns=["pdays"])
+
+
+def _record_float(value: Any) -> float:
+    if value is None or value == "":
+        return float("nan")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def clean_record(record: dict[str, Any]) -> dict[str, Any]:
+    # Row-level twin of build_option_a_frame for single-customer scoring (no pandas round-trip).
+    missing_cols = [c for c in OPTION_A_BASE_FEATURES if c not in record]
+    if missing_cols:
+        raise KeyError(f"Missing expected Option A columns: {missing_cols}")
+
+    out: dict[str, Any] = {}
+    for col in CATEGORICAL_COLS:
+        v = record[col]
+        if v is None or (isinstance(v, float) and v != v) or v in UNKNOWN_TOKENS:
+            v = None
+        out[col] = v
+    for col in ("age", "balance", "previous"):
+        out[col] = _record_float(record[col])
+    pdays = _record_float(record["pdays"])
+    pdays_clean = float("nan") if pdays in PDAYS_NO_PREV_SENTINELS else pdays
+    out["pdays_clean"] = pdays_clean
+    out["prev_contacted"] = 0.0 if pdays_clean != pdays_clean else 1.0
+    return out
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _versions(root: Path) -> list[tuple[int, Path]]:
+    if not root.exists():
+        return []
+    out = []
+    for p in root.iterdir():
+        m = VERSION_RE.match(p.name)
+        if m and p.is_dir() and (p / MODEL_FILENAME).exists():
+            out.append((int(m.group(1)), p))
+    return sorted(out)
+
+
+def save_model_artifact(model: Any, root: Path, *, metadata: dict[str, Any] | None = None) -> Path:
+    import joblib
+    import sklearn
+
+    root = Path(root)
+    existing = _versions(root)
+    version = existing[-1][0] + 1 if existing else 1
+    version_dir = root / f"v{version:03d}"
+    version_dir.mkdir(parents=True, exist_ok=False)
+
+    model_path = version_dir / MODEL_FILENAME
+    joblib.dump(model, model_path)
+
+    meta: dict[str, Any] = {
+        "version": version_dir.name,
+        "created_utc": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "model_file": MODEL_FILENAME,
+        "model_sha256": _sha256(model_path),
+        "python": platform.python_version(),
+        "scikit-learn": sklearn.__version__,
+        "feature_engineering": {
+            "base_features": OPTION_A_BASE_FEATURES,
+            "categorical_cols": CATEGORICAL_COLS,
+            "numeric_cols": NUMERIC_COLS,
+            "unknown_tokens": sorted(UNKNOWN_TOKENS),
+            "pdays_no_prev_sentinels": sorted(PDAYS_NO_PREV_SENTINELS),
+        },
+        **(metadata or {}),
+    }
+    (version_dir / META_FILENAME).write_text(json.dumps(meta, ensure_ascii=False, indent=2) + "\n", encoding="utf-8")
+    return version_dir
+
+
+def resolve_model_artifact(path: Path) -> Path:
+    # Accept either a version dir (models/option-a/v003) or the artifact root (-> latest version).
+    path = Path(path)
+    if (path / MODEL_FILENAME).exists():
+        return path
+    existing = _versions(path)
+    if not existing:
+        raise FileNotFoundError(f"No model artifact found under: {path}")
+    return existing[-1][1]
+
+
+def read_model_meta(path: Path) -> dict[str, Any]:
+    version_dir = resolve_model_artifact(path)
+    meta_path = version_dir / META_FILENAME
+    meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    meta.setdefault("version", version_dir.name)
+    meta["path"] = str(version_dir)
+    return meta
+
+
+def load_model_artifact(path: Path) -> tuple[Any, dict[str, Any]]:
+    import joblib
+
+    meta = read_model_meta(path)
+    model_path = Path(meta["path"]) / MODEL_FILENAME
+    expected = meta.get("model_sha256")
+    if expected and _sha256(model_path) != expected:
+        raise RuntimeError(f"Model file checksum mismatch (artifact modified after save?): {model_path}")
+    return joblib.load(model_path), meta
@@ -0,0 +1,399 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import pickle
+import re
+import shutil
+import sys
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+CACHE_FORMAT = 2
+STEP_HEADER_RE = re.compile(r"^#\s*Step\s+(\d+)\b")
+
+
+@dataclass(frozen=True)
+class StepSpec:
+    name: str
+    number: int
+    inputs: tuple[str, ...] = ()
+    outputs: tuple[str, ...] = ()
+    # Repo files the step's code imports (relative to the notebook); their contents are part of the cache key.
+    code_deps: tuple[str, ...] = ()
+
+
+TARGETING_METRICS = "skills/ba4ai-targeting-metrics/scripts/targeting_metrics.py"
+
+# Globals each notebook step reads (inputs) and hands to later steps (outputs). Steps whose
+# inputs do not depend on each other (e.g. 9-13) run in parallel.
+# Functions defined in a step (e.g. Step 7's precision_at_k) are not passed on: they live in the step's
+# __main__ and cannot be unpickled in another process. Step 8 then uses its own identical
+# _precision_at_k_fallback.
+STEPS: list[StepSpec] = [
+    StepSpec("outputs", 1, (), ("PROJECT_OUTPUTS",)),
+    StepSpec("environment", 2, (), ("SEED", "ACCESS_UTC", "env_info")),
+    StepSpec("ingest", 3, ("ACCESS_UTC",), ("X_raw", "y_raw", "provenance")),
+    StepSpec("eda", 4, ("X_raw", "y_raw")),
+    StepSpec(
+        "features",
+        5,
+        ("X_raw", "y_raw", "SEED"),
+        ("X_model", "y", "preprocess_lr", "preprocess_tree", "CATEGORICAL_COLS", "NUMERIC_COLS"),
+    ),
+    StepSpec("split", 6, ("X_model", "y", "SEED"), ("X_train", "X_val", "X_test", "y_train", "y_val", "y_test")),
+    StepSpec(
+        "models",
+        7,
+        ("X_train", "y_train", "X_val", "y_val", "preprocess_lr", "preprocess_tree", "SEED"),
+        ("MODEL_DUMMY", "MODEL_LR", "MODEL_RF", "K_CANDIDATES", "results_df"),
+    ),
+    StepSpec(
+        "calibration",
+        8,
+        ("X_raw", "X_train", "y_train", "X_val", "y_val", "X_test", "MODEL_LR", "MODEL_RF", "K_CANDIDATES", "SEED"),
+        ("MODEL_SELECTED", "MODEL_SELECTED_NAME", "MODEL_CALIBRATED", "CALIBRATION_METHOD_SELECTED"),
+        ("scripts/option_a_model.py",),
+    ),
+    StepSpec("test_evaluation", 9, ("X_test", "y_test", "MODEL_CALIBRATED", "MODEL_SELECTED_NAME")),
+    StepSpec(
+        "interpretation",
+        10,
+        ("X_val", "y_val", "MODEL_SELECTED", "MODEL_SELECTED_NAME", "MODEL_LR", "SEED"),
+        (),
+        ("scripts/driver_importance.py", TARGETING_METRICS),
+    ),
+    StepSpec(
+        "recommendation",
+        11,
+        ("X_test", "y_test", "MODEL_CALIBRATED", "CALIBRATION_METHOD_SELECTED"),
+        (),
+        (TARGETING_METRICS,),
+    ),
+    StepSpec(
+        "slides",
+        12,
+        ("provenance", "X_model", "y", "MODEL_CALIBRATED", "X_test", "y_test"),
+        (),
+        (TARGETING_METRICS,),
+    ),
+    StepSpec("guardrails", 13, ("X_model",)),
+    StepSpec("done_check", 14),
+]
+
+
+def _sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def extract_step_code(ipynb_path: Path) -> dict[int, str]:
+    nb = json.loads(ipynb_path.read_text(encoding="utf-8"))
+    code: dict[int, list[str]] = {}
+    current: int | None = None
+    for cell in nb.get("cells", []):
+        if cell.get("cell_type") != "code":
+            continue
+        src = cell.get("source", "")
+        src = "".join(src) if isinstance(src, list) else src
+        m = STEP_HEADER_RE.match(src.lstrip())
+        if m:
+            current = int(m.group(1))
+        if current is None:
+            raise ValueError(f"Code cell {cell.get('id')!r} appears before any '# Step N' header")
+        # Cells without their own header belong to the preceding step (same as running top-down).
+        code.setdefault(current, []).append(src.rstrip() + "\n")
+    return {n: "\n".join(parts) for n, parts in code.items()}
+
+
+def _resolve_step(token: str) -> StepSpec:
+    for spec in STEPS:
+        if token == spec.name or token == str(spec.number):
+            return spec
+    raise SystemExit(f"Unknown step: {token} (use a name or number; see --list)")
+
+
+def _producers() -> dict[str, StepSpec]:
+    out: dict[str, StepSpec] = {}
+    for spec in STEPS:
+        for name in spec.inputs:
+            if name not in out:
+                raise ValueError(f"Step {spec.number} ({spec.name}) reads '{name}' before any step produces it")
+        for name in spec.outputs:
+            out[name] = spec
+    return out
+
+
+def _ancestors(targets: list[StepSpec], producers: dict[str, StepSpec]) -> set[str]:
+    seen: set[str] = set()
+    stack = list(targets)
+    while stack:
+        spec = stack.pop()
+        if spec.name in seen:
+            continue
+        seen.add(spec.name)
+        stack.extend(producers[n] for n in spec.inputs)
+    return seen
+
+
+def code_dep_digests(spec: StepSpec, workdir: Path) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for rel in spec.code_deps:
+        path = workdir / rel
+        if not path.is_file():
+            raise SystemExit(f"Step {spec.number} ({spec.name}) declares code dependency {rel}, which does not exist")
+        out[rel] = _sha256_bytes(path.read_bytes())
+    return out
+
+
+def step_key(spec: StepSpec, code: str, input_digests: dict[str, str], dep_digests: dict[str, str]) -> str:
+    payload = json.dumps(
+        {
+            "format": CACHE_FORMAT,
+            "step": spec.name,
+            "code_sha256": _sha256_bytes(code.encode("utf-8")),
+            "code_deps": dict(sorted(dep_digests.items())),
+            "inputs": dict(sorted(input_digests.items())),
+            "outputs": list(spec.outputs),
+        },
+        sort_keys=True,
+    )
+    return _sha256_bytes(payload.encode("utf-8"))[:24]
+
+
+def _read_cached(entry_dir: Path) -> dict[str, Any] | None:
+    meta_path = entry_dir / "meta.json"
+    if not meta_path.exists():
+        return None
+    return json.loads(meta_path.read_text(encoding="utf-8"))
+
+
+def _save_open_figures(fig_dir: Path) -> list[str]:
+    if "matplotlib.pyplot" not in sys.modules:
+        return []
+    plt = sys.modules["matplotlib.pyplot"]
+    names = []
+    for num in plt.get_fignums():
+        fig_dir.mkdir(parents=True, exist_ok=True)
+        name = f"fig{num:02d}.png"
+        plt.figure(num).savefig(fig_dir / name, bbox_inches="tight")
+        names.append(name)
+    plt.close("all")
+    return names
+
+
+def execute_step(
+    spec: StepSpec,
+    code: str,
+    key: str,
+    input_paths: dict[str, str],
+    cache_root: str,
+    workdir: str,
+) -> dict[str, Any]:
+    os.chdir(workdir)
+    os.environ.setdefault("MPLBACKEND", "Agg")
+
+    entry_dir = Path(cache_root) / spec.name / key
+    tmp_dir = entry_dir.with_name(f"{key}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    tmp_dir.mkdir(parents=True)
+
+    ns: dict[str, Any] = {"__name__": "__main__"}
+    input_digests: dict[str, str] = {}
+    for name, path in input_paths.items():
+        data = Path(path).read_bytes()
+        input_digests[name] = _sha256_bytes(data)
+        ns[name] = pickle.loads(data)
+
+    buf = io.StringIO()
+    started = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(buf), contextlib.redirect_stderr(buf):
+            exec(compile(code, f"<step {spec.number}: {spec.name}>", "exec"), ns)
+    except BaseException as e:
+        buf.write(traceback.format_exc())
+        raise RuntimeError(f"{type(e).__name__}: {e} (full output: {tmp_dir / 'output.txt'})") from None
+    finally:
+        (tmp_dir / "output.txt").write_text(buf.getvalue(), encoding="utf-8")
+    wall_s = time.perf_counter() - started
+
+    missing = [n for n in spec.outputs if n not in ns]
+    if missing:
+        raise RuntimeError(f"Step {spec.number} ({spec.name}) did not define declared outputs: {missing}")
+
+    out_dir = tmp_dir / "outputs"
+    out_dir.mkdir()
+    output_digests: dict[str, str] = {}
+    for name in spec.outputs:
+        data = pickle.dumps(ns[name], protocol=pickle.HIGHEST_PROTOCOL)
+        output_digests[name] = _sha256_bytes(data)
+        (out_dir / f"{name}.pkl").write_bytes(data)
+
+    meta = {
+        "step": spec.name,
+        "number": spec.number,
+        "key": key,
+        "inputs": input_digests,
+        "outputs": output_digests,
+        "figures": _save_open_figures(tmp_dir / "figures"),
+        "wall_s": wall_s,
+        "finished_utc": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+    (tmp_dir / "meta.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    # meta.json is written last and the directory is swapped in atomically, so a crashed step never looks cached.
+    shutil.rmtree(entry_dir, ignore_errors=True)
+    os.replace(tmp_dir, entry_dir)
+    return meta
+
+
+def run_pipeline(
+    ipynb_path: Path,
+    cache_root: Path,
+    *,
+    targets: list[StepSpec] | None = None,
+    force: set[str] | None = None,
+    workers: int = 2,
+    show_output: bool = False,
+) -> dict[str, dict[str, Any]]:
+    code_by_number = extract_step_code(ipynb_path)
+    declared = {s.number for s in STEPS}
+    undeclared = sorted(set(code_by_number) - declared)
+    if undeclared:
+        raise SystemExit(f"Notebook has steps without a declaration in STEPS: {undeclared}")
+
+    producers = _producers()
+    selected = _ancestors(targets or STEPS, producers)
+    force = force or set()
+    workdir = str(ipynb_path.resolve().parent)
+    cache_root = cache_root.resolve()
+    # Hashed once per run: edits to imported repo code between runs invalidate the steps that import it.
+    dep_digests = {s.name: code_dep_digests(s, Path(workdir)) for s in STEPS if s.name in selected}
+
+    done: dict[str, dict[str, Any]] = {}
+    pending = [s for s in STEPS if s.name in selected]
+    running: dict[Future[dict[str, Any]], StepSpec] = {}
+
+    def input_paths(spec: StepSpec) -> dict[str, str]:
+        out = {}
+        for name in spec.inputs:
+            src = done[producers[name].name]
+            out[name] = str(cache_root / src["step"] / src["key"] / "outputs" / f"{name}.pkl")
+        return out
+
+    def report(spec: StepSpec, meta: dict[str, Any], status: str) -> None:
+        entry = cache_root / spec.name / meta["key"]
+        print(f"[{status}] Step {spec.number:>2} {spec.name:<16} {meta['wall_s']:8.1f}s  {entry}")
+        if show_output and status == "run":
+            text = (entry / "output.txt").read_text(encoding="utf-8")
+            if text.strip():
+                print(text.rstrip())
+
+    max_tasks = {"max_tasks_per_child": 1} if sys.version_info >= (3, 11) else {}
+    with ProcessPoolExecutor(max_workers=max(1, workers), **max_tasks) as ex:
+        while pending or running:
+            progressed = True
+            while progressed:
+                progressed = False
+                for spec in list(pending):
+                    if not all(producers[n].name in done for n in spec.inputs):
+                        continue
+                    pending.remove(spec)
+                    progressed = True
+                    code = code_by_number.get(spec.number, "")
+                    digests = {n: done[producers[n].name]["outputs"][n] for n in spec.inputs}
+                    key = step_key(spec, code, digests, dep_digests[spec.name])
+                    cached = _read_cached(cache_root / spec.name / key)
+                    if cached is not None and spec.name not in force:
+                        done[spec.name] = cached
+                        report(spec, cached, "cached")
+                        continue
+                    fut = ex.submit(execute_step, spec, code, key, input_paths(spec), str(cache_root), workdir)
+                    running[fut] = spec
+
+            if not running:
+                break
+            finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for fut in finished:
+                spec = running.pop(fut)
+                try:
+                    meta = fut.result()
+                except Exception as e:
+                    for other in running:
+                        other.cancel()
+                    raise SystemExit(f"Step {spec.number} ({spec.name}) failed: {e}") from e
+                done[spec.name] = meta
+                report(spec, meta, "run")
+    return done
+
+
+def print_plan(ipynb_path: Path, cache_root: Path) -> None:
+    code_by_number = extract_step_code(ipynb_path)
+    producers = _producers()
+    cache_root = cache_root.resolve()
+    workdir = ipynb_path.resolve().parent
+    digests_known: dict[str, dict[str, str]] = {}
+    for spec in STEPS:
+        upstream = {producers[n].name for n in spec.inputs}
+        if not upstream.issubset(digests_known):
+            status = "pending upstream"
+        else:
+            digests = {n: digests_known[producers[n].name][n] for n in spec.inputs}
+            key = step_key(spec, code_by_number.get(spec.number, ""), digests, code_dep_digests(spec, workdir))
+            cached = _read_cached(cache_root / spec.name / key)
+            status = "cached" if cached else "stale"
+            if cached:
+                digests_known[spec.name] = cached["outputs"]
+        deps = ", ".join(str(n) for n in sorted({producers[i].number for i in spec.inputs})) or "-"
+        print(f"Step {spec.number:>2} {spec.name:<16} after [{deps}]  {status}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the project.ipynb steps headlessly as a DAG: each step's declared outputs are cached on disk, keyed by "
+            "the step's code, the repo modules it imports and the hashes of its inputs, and only invalidated steps are re-executed."
+        )
+    )
+    parser.add_argument("--notebook", default="project.ipynb")
+    parser.add_argument("--cache", default=".cache/pipeline", help="Step artifact cache directory")
+    parser.add_argument("--until", action="append", default=[], help="Run only this step (name or number) and its upstream steps")
+    parser.add_argument("--force", action="append", default=[], help="Re-execute this step even if cached (repeatable)")
+    parser.add_argument("--workers", type=int, default=2, help="Steps executed in parallel when independent")
+    parser.add_argument("--show-output", action="store_true", help="Print captured stdout of executed steps")
+    parser.add_argument("--list", action="store_true", help="Show the step DAG and cache status without running")
+    args = parser.parse_args()
+
+    ipynb_path = Path(args.notebook)
+    if not ipynb_path.exists():
+        raise SystemExit(f"Notebook not found: {ipynb_path}")
+
+    if args.list:
+        print_plan(ipynb_path, Path(args.cache))
+        return
+
+    targets = [_resolve_step(t) for t in args.until] or None
+    force = {_resolve_step(t).name for t in args.force}
+    started = time.perf_counter()
+    done = run_pipeline(
+        ipynb_path,
+        Path(args.cache),
+        targets=targets,
+        force=force,
+        workers=args.workers,
+        show_output=args.show_output,
+    )
+    print(f"Pipeline finished: {len(done)} steps in {time.perf_counter() - started:.1f}s (cache: {args.cache}).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Sequence
+
+import numpy as np
+import pandas as pd
+
+from compiled_model import CompileError, compile_model
+from option_a_model import build_option_a_frame, clean_record, load_model_artifact
+
+
+EXAMPLE_CUSTOMER = {
+    "age": 35,
+    "job": "management",
+    "marital": "married",
+    "education": "tertiary",
+    "default": "no",
+    "balance": 1200,
+    "housing": "yes",
+    "loan": "no",
+    "pdays": -1,
+    "previous": 0,
+    "poutcome": None,
+}
+
+# Records the compiled scorer must reproduce before it is used (seen and unknown categories, both pdays cases).
+PARITY_RECORDS = [
+    EXAMPLE_CUSTOMER,
+    {**EXAMPLE_CUSTOMER, "age": 61, "job": "retired", "marital": "divorced", "balance": -250, "pdays": 92, "previous": 3, "poutcome": "success"},
+    {**EXAMPLE_CUSTOMER, "age": 24, "job": "student", "marital": "single", "education": "unknown", "housing": "no", "poutcome": "failure", "pdays": 180, "previous": 1},
+    {**EXAMPLE_CUSTOMER, "job": "not-a-job", "default": "yes", "loan": "yes", "balance": None},
+]
+PARITY_ATOL = 1e-9
+
+HTTP_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 500: "Internal Server Error"}
+
+
+class LatencyTracker:
+    def __init__(self, maxlen: int = 100_000) -> None:
+        self.samples: deque[float] = deque(maxlen=maxlen)
+        self.batch_rows: deque[int] = deque(maxlen=maxlen)
+        self.requests = 0
+
+    def add(self, seconds: float) -> None:
+        self.samples.append(seconds)
+        self.requests += 1
+
+    def add_batch(self, rows: int) -> None:
+        self.batch_rows.append(rows)
+
+    def summary(self) -> dict[str, Any]:
+        out: dict[str, Any] = {"requests": self.requests, "batches": len(self.batch_rows)}
+        if self.samples:
+            arr = np.fromiter(self.samples, dtype=float) * 1e3
+            p50, p99 = np.percentile(arr, [50, 99])
+            out.update({"p50_ms": float(p50), "p99_ms": float(p99), "max_ms": float(arr.max()), "window": len(arr)})
+        if self.batch_rows:
+            out["mean_batch_rows"] = float(np.mean(self.batch_rows))
+        return out
+
+
+class Scorer:
+    def __init__(self, model: Any, meta: dict[str, Any], *, use_compiled: bool = True) -> None:
+        self.model = model
+        self.version = meta.get("version")
+        self.compiled = None
+        self.mode = "pipeline"
+        if use_compiled:
+            try:
+                self.compiled = compile_model(model)
+                self.mode = f"compiled-{self.compiled.kind}"
+            except CompileError as e:
+                print(f"[compile skipped] falling back to sklearn predict_proba: {e}")
+            if self.compiled is not None:
+                diff = self._parity_gap(PARITY_RECORDS)
+                if not diff <= PARITY_ATOL:
+                    print(f"[compile skipped] compiled scores differ from predict_proba (max |dp|={diff:.3g}); using the pipeline")
+                    self.compiled = None
+                    self.mode = "pipeline"
+
+    def _parity_gap(self, records: Sequence[dict[str, Any]]) -> float:
+        assert self.compiled is not None
+        try:
+            compiled = self.compiled.predict_proba_records([clean_record(r) for r in records])
+        except Exception:
+            return float("inf")
+        reference = self.model.predict_proba(build_option_a_frame(pd.DataFrame(list(records))))[:, 1]
+        return float(np.max(np.abs(compiled - reference)))
+
+    def prepare(self, record: dict[str, Any]) -> dict[str, Any]:
+        # Runs per request so a malformed record fails its own request, not the whole micro-batch.
+        cleaned = clean_record(record)
+        return cleaned if self.compiled is not None else record
+
+    def score(self, rows: Sequence[dict[str, Any]]) -> np.ndarray:
+        if self.compiled is not None:
+            return self.compiled.predict_proba_records(rows)
+        return self.model.predict_proba(build_option_a_frame(pd.DataFrame(list(rows))))[:, 1]
+
+
+class MicroBatcher:
+    def __init__(
+        self,
+        score_fn: Callable[[Sequence[dict[str, Any]]], np.ndarray],
+        *,
+        max_batch: int,
+        max_wait_s: float,
+        stats: LatencyTracker,
+    ) -> None:
+        self.score_fn = score_fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_s
+        self.stats = stats
+        self.queue: asyncio.Queue[tuple[list[dict[str, Any]], asyncio.Future[np.ndarray]]] = asyncio.Queue()
+
+    async def submit(self, rows: list[dict[str, Any]]) -> np.ndarray:
+        fut: asyncio.Future[np.ndarray] = asyncio.get_running_loop().create_future()
+        await self.queue.put((rows, fut))
+        return await fut
+
+    async def _collect(self) -> list[tuple[list[dict[str, Any]], asyncio.Future[np.ndarray]]]:
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        n_rows = len(items[0][0])
+        deadline = loop.time() + self.max_wait_s
+        while n_rows < self.max_batch:
+            try:
+                item = self.queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            items.append(item)
+            n_rows += len(item[0])
+        return items
+
+    async def run(self) -> None:
+        while True:
+            items = await self._collect()
+            rows = [r for batch, _ in items for r in batch]
+            self.stats.add_batch(len(rows))
+            try:
+                p = self.score_fn(rows)
+            except Exception as e:
+                for _, fut in items:
+                    if not fut.done():
+                        fut.set_exception(e)
+                continue
+            start = 0
+            for batch, fut in items:
+                if not fut.done():
+                    fut.set_result(p[start : start + len(batch)])
+                start += len(batch)
+
+
+def _http_response(status: int, payload: dict[str, Any], *, keep_alive: bool) -> bytes:
+    body = json.dumps(payload).encode("utf-8")
+    head = (
+        f"HTTP/1.1 {status} {HTTP_REASONS.get(status, 'OK')}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+        "\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class ScoringService:
+    def __init__(self, scorer: Scorer, *, max_batch: int = 64, max_wait_ms: float = 2.0) -> None:
+        self.scorer = scorer
+        self.stats = LatencyTracker()
+        self.batcher = MicroBatcher(scorer.score, max_batch=max_batch, max_wait_s=max_wait_ms / 1e3, stats=self.stats)
+        self._batcher_task: asyncio.Task[None] | None = None
+        self.server: asyncio.AbstractServer | None = None
+
+    async def start(self, host: str, port: int) -> tuple[str, int]:
+        self._batcher_task = asyncio.create_task(self.batcher.run())
+        self.server = await asyncio.start_server(self._handle, host, port)
+        sock_host, sock_port = self.server.sockets[0].getsockname()[:2]
+        return sock_host, sock_port
+
+    async def stop(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self._batcher_task is not None:
+            self._batcher_task.cancel()
+
+    async def _score(self, body: bytes) -> tuple[int, dict[str, Any]]:
+        try:
+            req = json.loads(body or b"{}")
+        except json.JSONDecodeError as e:
+            return 400, {"error": f"invalid JSON: {e}"}
+        if not isinstance(req, dict):
+            return 400, {"error": "expected a JSON object"}
+        single = "customer" in req
+        records = [req["customer"]] if single else req.get("customers")
+        if not isinstance(records, list) or not records or not all(isinstance(r, dict) for r in records):
+            return 400, {"error": "expected {'customer': {...}} or {'customers': [{...}, ...]}"}
+        try:
+            rows = [self.scorer.prepare(r) for r in records]
+        except (KeyError, TypeError) as e:
+            return 400, {"error": str(e.args[0]) if e.args else type(e).__name__}
+        p = await self.batcher.submit(rows)
+        p_out: Any = float(p[0]) if single else [float(x) for x in p]
+        return 200, {"p_hat": p_out, "model_version": self.scorer.version}
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple[int, dict[str, Any]]:
+        if path == "/score":
+            if method != "POST":
+                return 405, {"error": "use POST"}
+            return await self._score(body)
+        if path == "/health":
+            return 200, {"status": "ok", "mode": self.scorer.mode, "model_version": self.scorer.version}
+        if path == "/stats":
+            return 200, self.stats.summary()
+        return 404, {"error": f"unknown path: {path}"}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, version = request_line.decode("latin-1").split()
+                headers: dict[str, str] = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", "0")))
+
+                t0 = time.perf_counter()
+                path = target.split("?", 1)[0]
+                try:
+                    status, payload = await self._route(method, path, body)
+                except Exception as e:
+                    status, payload = 500, {"error": str(e)}
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(_http_response(status, payload, keep_alive=keep_alive))
+                await writer.drain()
+                if path == "/score" and status == 200:
+                    self.stats.add(time.perf_counter() - t0)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+
+async def _client_requests(host: str, port: int, bodies: list[bytes], latencies: list[float]) -> None:
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            t0 = time.perf_counter()
+            writer.write(
+                (
+                    f"POST /score HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n"
+                ).encode("latin-1")
+                + body
+            )
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                key, _, value = line.decode("latin-1").partition(":")
+                if key.strip().lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t0)
+    finally:
+        writer.close()
+
+
+async def run_load_test(
+    service: ScoringService,
+    records: list[dict[str, Any]],
+    *,
+    n_requests: int,
+    concurrency: int,
+) -> dict[str, Any]:
+    host, port = await service.start("127.0.0.1", 0)
+    try:
+        bodies = [json.dumps({"customer": records[i % len(records)]}).encode("utf-8") for i in range(n_requests)]
+        latencies: list[float] = []
+        t0 = time.perf_counter()
+        await asyncio.gather(
+            *[_client_requests(host, port, bodies[w::concurrency], latencies) for w in range(concurrency)]
+        )
+        elapsed = time.perf_counter() - t0
+    finally:
+        await service.stop()
+
+    arr = np.asarray(latencies) * 1e3
+    p50, p99 = np.percentile(arr, [50, 99])
+    return {
+        "requests": n_requests,
+        "concurrency": concurrency,
+        "throughput_rps": n_requests / elapsed if elapsed > 0 else float("nan"),
+        "client_p50_ms": float(p50),
+        "client_p99_ms": float(p99),
+        "server": service.stats.summary(),
+    }
+
+
+def _load_sample_records(path: Path | None, limit: int = 10_000) -> list[dict[str, Any]]:
+    if path is None:
+        return [EXAMPLE_CUSTOMER]
+    frame = pd.read_csv(path, nrows=limit)
+    frame = frame.astype(object).where(frame.notna(), None)
+    return frame.to_dict("records")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=(
+            "Serve single-customer propensity scores over HTTP from the persisted calibrated model, "
+            "grouping concurrent requests into micro-batches."
+        )
+    )
+    parser.add_argument("--model", default="models/option-a", help="Model artifact root (latest version) or version dir")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=64, help="Max rows scored together in one micro-batch")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0, help="Max time a request waits for a batch to fill")
+    parser.add_argument("--no-compile", action="store_true", help="Score with sklearn predict_proba instead of flat lookups")
+    parser.add_argument("--load-test", type=int, default=0, metavar="N", help="Run N requests against a localhost instance and exit")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent client connections for --load-test")
+    parser.add_argument("--sample-csv", default=None, help="Customer CSV used as request payloads for --load-test")
+    args = parser.parse_args()
+
+    model, meta = load_model_artifact(Path(args.model))
+    scorer = Scorer(model, meta, use_compiled=not args.no_compile)
+    service = ScoringService(scorer, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    print(f"Loaded model {scorer.version} (mode: {scorer.mode}).")
+
+    if args.load_test > 0:
+        records = _load_sample_records(Path(args.sample_csv) if args.sample_csv else None)
+        result = asyncio.run(
+            run_load_test(service, records, n_requests=args.load_test, concurrency=max(1, args.concurrency))
+        )
+        print(json.dumps(result, indent=2))
+        return
+
+    async def serve() -> None:
+        host, port = await service.start(args.host, args.port)
+        print(f"Listening on http://{host}:{port} (POST /score, GET /health, GET /stats)")
+        assert service.server is not None
+        await service.server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"Latency summary: {json.dumps(service.stats.summary())}")
+
+
+if __name__ == "__main__":
+    main()
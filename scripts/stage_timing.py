@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterator
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+
+# ru_maxrss is KiB on Linux and bytes on macOS.
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def _maxrss_bytes(usage: Any) -> int:
+    return int(usage.ru_maxrss) * _MAXRSS_UNIT
+
+
+def peak_rss_bytes() -> int | None:
+    # High-water mark of this process; None where the resource module is unavailable.
+    if resource is None:
+        return None
+    return _maxrss_bytes(resource.getrusage(resource.RUSAGE_SELF))
+
+
+def _read_cmdline(pid: int | str) -> bytes | None:
+    try:
+        with open(f"/proc/{pid}/cmdline", "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def _read_vmhwm(pid: int, parent_cmdline: bytes | None) -> int | None:
+    # Linux only: the child's own RSS high-water mark, which exec resets (unlike ru_maxrss). Until exec the child
+    # still runs the parent's image (and, after vfork, the parent's memory), recognisable by the parent's cmdline.
+    cmdline = _read_cmdline(pid)
+    if not cmdline or cmdline == parent_cmdline:
+        return None
+    try:
+        with open(f"/proc/{pid}/status", "rb") as f:
+            for line in f:
+                if line.startswith(b"VmHWM:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _process_tree(pid: int) -> list[int]:
+    # pid plus its live descendants, via /proc/<pid>/task/<tid>/children (Linux).
+    tree, stack = [], [pid]
+    while stack:
+        p = stack.pop()
+        tree.append(p)
+        try:
+            tasks = os.listdir(f"/proc/{p}/task")
+        except OSError:
+            continue
+        for tid in tasks:
+            try:
+                with open(f"/proc/{p}/task/{tid}/children", "rb") as f:
+                    stack.extend(int(c) for c in f.read().split())
+            except (OSError, ValueError):
+                continue
+    return tree
+
+
+_SAMPLE_INTERVAL_S = 0.005
+
+
+def _wait_child(pid: int, parent_peak: int | None) -> tuple[int, int | None, str | None]:
+    """Reap `pid`, returning (wait status, peak RSS bytes, source of that value).
+
+    A helper thread blocks in wait4, so the caller resumes as soon as the child exits. Meanwhile this thread
+    samples VmHWM of the child and its live descendants (e.g. Chrome's renderer processes) every few ms
+    ("vmhwm"), keeping the largest single process. Descendants that start and exit between samples are
+    covered by wait4's ru_maxrss, which includes reaped descendants. However, ru_maxrss starts from the
+    parent's high-water mark (fork/vfork copy it), so it is trusted only when it exceeds the parent's peak at
+    spawn. The larger of the two is reported ("rusage" if that is ru_maxrss); the peak is unknown (None) when
+    neither is available.
+    """
+    result: dict[str, Any] = {}
+    done = threading.Event()
+
+    def reap() -> None:
+        try:
+            _, result["status"], result["usage"] = os.wait4(pid, 0)
+        except BaseException as e:  # surfaced in the calling thread
+            result["error"] = e
+        finally:
+            done.set()
+
+    waiter = threading.Thread(target=reap, name=f"wait4-{pid}", daemon=True)
+    waiter.start()
+    sampled: int | None = None
+    parent_cmdline = _read_cmdline("self")
+    while not done.is_set():
+        for p in _process_tree(pid):
+            hwm = _read_vmhwm(p, parent_cmdline)
+            if hwm is not None:
+                sampled = max(sampled or 0, hwm)
+        done.wait(_SAMPLE_INTERVAL_S)
+    waiter.join()
+    if "error" in result:
+        raise result["error"]
+
+    status = result["status"]
+    rusage = _maxrss_bytes(result["usage"])
+    if parent_peak is not None and rusage <= parent_peak:
+        rusage = None
+    if rusage is not None and (sampled is None or rusage > sampled):
+        return status, rusage, "rusage"
+    if sampled is not None:
+        return status, sampled, "vmhwm"
+    return status, None, None
+
+
+class StageRecorder:
+    """Collects wall time, bytes written and peak RSS per named stage.
+
+    Stages nest: bytes added inside a child stage also count towards its parents. `peak_rss_bytes` is the
+    process high-water mark when the stage ended; `rss_growth_bytes` is how much the stage raised it.
+    Stages named in `aggregate_only` (high-volume ones such as individual file writes) appear in the totals
+    but are not listed one by one.
+    """
+
+    enabled = True
+
+    def __init__(self, *, aggregate_only: set[str] | None = None) -> None:
+        self.aggregate_only = set(aggregate_only or ())
+        self.records: list[dict[str, Any]] = []
+        self._stack: list[dict[str, Any]] = []
+        self._t0 = time.perf_counter()
+
+    @contextlib.contextmanager
+    def stage(self, name: str, **labels: Any) -> Iterator[dict[str, Any]]:
+        rec: dict[str, Any] = {"stage": name, **labels, "depth": len(self._stack), "bytes_written": 0}
+        self._stack.append(rec)
+        rss0 = peak_rss_bytes()
+        t0 = time.perf_counter()
+        try:
+            yield rec
+        finally:
+            rec["wall_s"] = time.perf_counter() - t0
+            self._stack.pop()
+            if "peak_rss_bytes" not in rec:  # subprocess stages record the child's peak (or None) instead
+                rss1 = peak_rss_bytes()
+                rec["peak_rss_bytes"] = rss1
+                rec["rss_growth_bytes"] = None if rss0 is None or rss1 is None else rss1 - rss0
+            if self._stack:
+                self._stack[-1]["bytes_written"] += rec["bytes_written"]
+            self.records.append(rec)
+
+    def add_bytes(self, n: int) -> None:
+        if self._stack:
+            self._stack[-1]["bytes_written"] += int(n)
+
+    def add_file(self, path: Path) -> None:
+        # Count a file a tool (or library call) wrote inside the current stage.
+        if path.exists():
+            self.add_bytes(path.stat().st_size)
+
+    def run(self, cmd: list[str], name: str, *, output: Path | None = None, **labels: Any) -> None:
+        # subprocess.run(cmd, check=True) as a stage, recording the child's peak RSS (see _wait_child) and the size
+        # of the file it produced (`output`).
+        with self.stage(name, **labels) as rec:
+            rec["subprocess"] = True
+            if not hasattr(os, "wait4"):
+                subprocess.run(cmd, check=True)
+                rec["peak_rss_bytes"] = None
+                rec["peak_rss_source"] = None
+            else:
+                parent_peak = peak_rss_bytes()
+                proc = subprocess.Popen(cmd)
+                try:
+                    status, child_peak, source = _wait_child(proc.pid, parent_peak)
+                except BaseException:
+                    # The waiter thread reaps the killed child; Popen.wait() then sees ECHILD and returns.
+                    proc.kill()
+                    proc.wait()
+                    raise
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                rec["peak_rss_bytes"] = child_peak
+                rec["peak_rss_source"] = source
+                if proc.returncode != 0:
+                    raise subprocess.CalledProcessError(proc.returncode, cmd)
+            if output is not None:
+                self.add_file(output)
+
+    def totals(self) -> dict[str, dict[str, Any]]:
+        out: dict[str, dict[str, Any]] = {}
+        for r in self.records:
+            t = out.setdefault(r["stage"], {"count": 0, "wall_s": 0.0, "bytes_written": 0, "peak_rss_bytes": None})
+            t["count"] += 1
+            t["wall_s"] += r["wall_s"]
+            t["bytes_written"] += r["bytes_written"]
+            if r["peak_rss_bytes"] is not None:
+                t["peak_rss_bytes"] = max(t["peak_rss_bytes"] or 0, r["peak_rss_bytes"])
+        return out
+
+    def rollup(self, label: str, stages: set[str]) -> list[dict[str, Any]]:
+        # Sum the given stages per label value (e.g. cells + section markdown per section_index).
+        groups: dict[Any, dict[str, Any]] = {}
+        for r in self.records:
+            if r["stage"] not in stages or label not in r:
+                continue
+            g = groups.setdefault(r[label], {label: r[label], "wall_s": 0.0, "bytes_written": 0, "peak_rss_bytes": None})
+            g["wall_s"] += r["wall_s"]
+            g["bytes_written"] += r["bytes_written"]
+            if r["peak_rss_bytes"] is not None:
+                g["peak_rss_bytes"] = max(g["peak_rss_bytes"] or 0, r["peak_rss_bytes"])
+        return list(groups.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "wall_s": time.perf_counter() - self._t0,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "totals": self.totals(),
+            "stages": [r for r in self.records if r["stage"] not in self.aggregate_only],
+        }
+
+
+class NullRecorder:
+    # Same interface as StageRecorder; does nothing, so call sites need no `if recorder:` branches.
+    enabled = False
+
+    def stage(self, name: str, **labels: Any) -> contextlib.nullcontext:
+        return contextlib.nullcontext({})
+
+    def add_bytes(self, n: int) -> None:
+        pass
+
+    def add_file(self, path: Path) -> None:
+        pass
+
+    def run(self, cmd: list[str], name: str, *, output: Path | None = None, **labels: Any) -> None:
+        subprocess.run(cmd, check=True)
+
+
+NULL_RECORDER = NullRecorder()
+
+
+@contextlib.contextmanager
+def profiled(prof_path: Path | None, *, top: int = 30) -> Iterator[None]:
+    # Dump cProfile stats to `prof_path` (load with pstats/snakeviz) plus a cumulative-time text summary next to it.
+    if prof_path is None:
+        yield
+        return
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield
+    finally:
+        prof.disable()
+        prof_path.parent.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(str(prof_path))
+        buf = io.StringIO()
+        pstats.Stats(prof, stream=buf).sort_stats("cumulative").print_stats(top)
+        prof_path.with_suffix(".txt").write_text(buf.getvalue(), encoding="utf-8")
@@ -1,11 +1,47 @@
 from __future__ import annotations
 
+import contextlib
+import functools
 from dataclasses import dataclass
-from typing import Iterable, Sequence
+from typing import Callable, ContextManager, Iterable, Iterator, Sequence
 
 import numpy as np
 
 
+# Optional timing hook: a callable `hook(stage_name)` returning a context manager (e.g. StageRecorder.stage
+# from scripts/stage_timing.py). None (the default) means the metric functions run uninstrumented.
+_STAGE_HOOK: Callable[[str], ContextManager] | None = None
+
+
+def set_stage_hook(hook: Callable[[str], ContextManager] | None) -> Callable[[str], ContextManager] | None:
+    global _STAGE_HOOK
+    previous, _STAGE_HOOK = _STAGE_HOOK, hook
+    return previous
+
+
+@contextlib.contextmanager
+def stage_hook(hook: Callable[[str], ContextManager]) -> Iterator[None]:
+    previous = set_stage_hook(hook)
+    try:
+        yield
+    finally:
+        set_stage_hook(previous)
+
+
+def instrumented(fn):
+    name = f"metrics.{fn.__name__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        hook = _STAGE_HOOK
+        if hook is None:
+            return fn(*args, **kwargs)
+        with hook(name):
+            return fn(*args, **kwargs)
+
+    return wrapper
+
+
 def _as_numpy_1d(a) -> np.ndarray:
     arr = np.asarray(a)
     if arr.ndim != 1:
@@ -22,6 +58,34 @@ def base_rate(y_true) -> float:
     return float(y.mean())
 
 
+@instrumented
+def pr_auc(y_true, p_hat) -> float:
+    # Average precision (step-wise PR-AUC), same definition as sklearn.metrics.average_precision_score.
+    y = _as_numpy_1d(y_true).astype(int)
+    p = _as_numpy_1d(p_hat).astype(float)
+    if len(y) != len(p):
+        raise ValueError("y_true and p_hat must have the same length")
+    if len(y) == 0:
+        raise ValueError("Inputs are empty")
+    total_pos = int(y.sum())
+    if total_pos == 0:
+        raise ValueError("y_true has no positives; PR-AUC is undefined")
+
+    order = np.argsort(-p, kind="mergesort")
+    p_sorted = p[order]
+    # Evaluate precision/recall only at distinct score thresholds (ties are scored together).
+    threshold_idx = np.r_[np.flatnonzero(np.diff(p_sorted)), len(p_sorted) - 1]
+    tps = np.cumsum(y[order])[threshold_idx]
+    precision = tps / (threshold_idx + 1)
+    recall = tps / total_pos
+    return float(np.sum(np.diff(np.r_[0.0, recall]) * precision))
+
+
+@instrumented
+def lift_at_k(y_true, p_hat, k: int) -> float:
+    return k_metrics_table(y_true, p_hat, [k])[0].lift_at_k
+
+
 @dataclass(frozen=True)
 class KMetricsRow:
     k: int
@@ -33,6 +97,7 @@ class KMetricsRow:
     incremental_positives_vs_random: float
 
 
+@instrumented
 def k_metrics_table(y_true, p_hat, k_list: Sequence[int]) -> list[KMetricsRow]:
     y = _as_numpy_1d(y_true).astype(int)
     p = _as_numpy_1d(p_hat).astype(float)
@@ -90,6 +155,7 @@ def _profit_random_baseline_expected(br: float, calls: int, p_success: float, c_
     return calls * (br * p_success - c_call)
 
 
+@instrumented
 def profit_topk_table(
     y_true,
     p_hat,
@@ -137,6 +203,7 @@ def profit_topk_table(
     return rows
 
 
+@instrumented
 def profit_threshold_table(
     y_true,
     p_hat,